@@ -0,0 +1,119 @@
+# components/admin_profiler.py
+# 관리자용 재실행(rerun) 프로파일러
+#
+# ADMIN_TOKEN (secrets 또는 환경변수) 이 설정되어 있고 주소에 ?admin=<토큰> 을 붙여 접속한 경우에만
+# 사이드바에 프로파일러가 표시됩니다. 켜면 다음 N번의 main.py 재실행을 샘플링 프로파일러로 기록합니다.
+# 꺼져 있을 때는 세션 상태 확인 한 번 외에는 아무 작업도 하지 않습니다.
+# 프로파일러 패널 자체를 조작해서 생긴 재실행(시작/중지, 프로파일 선택, 내려받기 등)은 기록하지 않습니다.
+import os
+import sys
+import hmac
+import time
+from pathlib import Path
+import streamlit as st
+import pandas as pd
+
+# 상위 디렉토리의 utils 모듈 import를 위한 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.profiler import SamplingProfiler
+
+MAX_PROFILED_RERUNS = 10    # 한 번에 예약할 수 있는 최대 재실행 수
+MAX_KEPT_PROFILES = 5       # 세션에 보관할 최근 프로파일 수
+TOP_FUNCTIONS = 30
+
+def get_admin_token():
+    """Streamlit secrets 또는 환경변수에서 관리자 토큰 가져오기"""
+    try:
+        return st.secrets["ADMIN_TOKEN"]
+    except:
+        return os.getenv("ADMIN_TOKEN")
+
+def is_admin():
+    """주소의 admin 파라미터가 관리자 토큰과 일치하는지 확인"""
+    token = get_admin_token()
+    if not token:
+        return False
+    # 한글 등 ASCII가 아닌 문자열은 compare_digest 가 TypeError 를 내므로 bytes로 비교
+    supplied = str(st.query_params.get("admin", "")).encode("utf-8")
+    return hmac.compare_digest(supplied, str(token).encode("utf-8"))
+
+def _mark_profiler_rerun():
+    """프로파일러 패널 위젯 콜백: 이번 재실행은 패널 조작이므로 기록하지 않도록 표시"""
+    st.session_state.profiler_ui_rerun = True
+
+def _start_profiling():
+    st.session_state.profile_runs_left = int(st.session_state.profile_runs_input)
+    _mark_profiler_rerun()
+
+def _stop_profiling():
+    st.session_state.profile_runs_left = 0
+    _mark_profiler_rerun()
+
+def _clear_profiles():
+    st.session_state.profiles = []
+    _mark_profiler_rerun()
+
+def start_rerun_profile():
+    """프로파일링이 예약된 재실행이면 프로파일러 시작 (아니면 None, 패널 조작으로 생긴 재실행은 건너뜀)"""
+    if st.session_state.pop("profiler_ui_rerun", False):
+        return None
+    if not st.session_state.get("profile_runs_left"):
+        return None
+    st.session_state.profile_runs_left -= 1
+    return SamplingProfiler().start()
+
+def finish_rerun_profile(profiler):
+    """프로파일러를 멈추고 결과를 세션에 보관 (st.rerun/st.stop 으로 중단된 재실행도 기록)"""
+    if profiler is None:
+        return
+    profiler.stop()
+    profiles = st.session_state.setdefault("profiles", [])
+    profiles.append({
+        "label": time.strftime("%H:%M:%S", time.localtime(profiler.started_at)),
+        "profiler": profiler,
+    })
+    del profiles[:-MAX_KEPT_PROFILES]
+
+def render_profiler_panel():
+    """사이드바 프로파일러 설정 및 결과 (관리자만 표시)"""
+    if not is_admin():
+        return
+
+    with st.sidebar:
+        st.subheader("🛠️ 재실행 프로파일러")
+        # 패널 위젯은 모두 콜백으로 처리해 그 재실행이 예약된 프로파일링 횟수를 쓰지 않도록 함
+        st.number_input("프로파일링할 재실행 수", min_value=1, max_value=MAX_PROFILED_RERUNS, value=1,
+                        key="profile_runs_input", on_change=_mark_profiler_rerun)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("▶️ 시작", use_container_width=True, on_click=_start_profiling)
+        with col2:
+            st.button("⏹️ 중지", use_container_width=True, on_click=_stop_profiling)
+
+        left = st.session_state.get("profile_runs_left", 0)
+        if left:
+            st.info(f"다음 재실행 {left}번을 기록합니다. 측정할 동작을 실행하세요.")
+
+        profiles = st.session_state.get("profiles", [])
+        if not profiles:
+            st.caption("기록된 프로파일이 없습니다.")
+            return
+
+        labels = [f"{i + 1}. {p['label']} ({p['profiler'].duration * 1000:.0f}ms)" for i, p in enumerate(profiles)]
+        selected = st.selectbox("프로파일", range(len(profiles)), index=len(profiles) - 1,
+                                format_func=lambda i: labels[i], on_change=_mark_profiler_rerun)
+        profiler = profiles[selected]["profiler"]
+        st.caption(f"실행 시간 {profiler.duration * 1000:.0f}ms · 샘플 {profiler.sample_count}개")
+
+        rows = profiler.top_functions(TOP_FUNCTIONS)
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+        name = f"rerun-{profiles[selected]['label'].replace(':', '')}"
+        st.download_button("📥 speedscope (.json)", profiler.to_speedscope(name),
+                           file_name=f"{name}.speedscope.json", mime="application/json",
+                           use_container_width=True, on_click=_mark_profiler_rerun)
+        st.download_button("📥 flamegraph (folded)", profiler.to_folded(),
+                           file_name=f"{name}.folded.txt", mime="text/plain",
+                           use_container_width=True, on_click=_mark_profiler_rerun)
+        st.button("🗑️ 프로파일 삭제", use_container_width=True, on_click=_clear_profiles)
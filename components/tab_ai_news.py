@@ -7,6 +7,28 @@ import streamlit as st
 import chromadb
 from openai import OpenAI
 import os
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+
+# 상위 디렉토리의 utils 모듈 import를 위한 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.news_filters import (
+    DATE_INDEX_KEY, int_to_date, detect_date_range, detect_sources,
+    build_where_clause, describe_filters
+)
+from utils.singleflight import SingleFlight, SingleFlightCancelled, SingleFlightTimeout
+from utils.shared_cache import get_shared_cache, make_key
+from utils.fact_extractor import answer_from_facts, detect_fact_question, fact_date_range
+from utils.query_router import QueryRouter, SIMPLE
+from utils.llm_governor import LLMGovernor, LLMOverloaded, LLMRequestCancelled, estimate_tokens
+from utils.tune_hnsw import is_internal_collection
+from utils.vector_index import MmapVectorIndex, load_manifest, get_embedding_function, collection_fingerprint
+from utils.precomputed_answers import (
+    PrecomputedAnswerStore, load_featured_questions, collection_version, answer_key
+)
 
 # API 키 설정
 def get_api_key(key_name):
@@ -20,6 +42,47 @@ def get_api_key(key_name):
 OPENAI_API_KEY = get_api_key('OPENAI_API_KEY')
 PINECONE_API_KEY = get_api_key('PINECONE_API_KEY')
 
+# 검색 엔진 선택: 'chroma' (HNSW) 또는 'numpy' (python -m utils.vector_index export 로 내보낸 전수 검색 인덱스)
+RETRIEVAL_BACKEND = (get_api_key('RETRIEVAL_BACKEND') or "chroma").lower()
+VECTOR_INDEX_CHECK_TTL = 600    # 내보낸 인덱스가 현재 컬렉션 내용과 같은지 다시 확인하는 주기 (초)
+
+# 백그라운드 처리 설정
+CHAT_MAX_WORKERS = 4        # 동시에 처리할 챗봇 요청 수 (프로세스 전체)
+RETRIEVAL_TIMEOUT = 20      # 기사 검색 단계 제한 시간 (초)
+LLM_TIMEOUT = 60            # 답변 생성 단계 제한 시간 (초)
+CHAT_POLL_INTERVAL = 1      # 처리 상태 확인 주기 (초)
+FEDERATED_QUOTA_RATIO = 1.5 # 여러 컬렉션 검색 시 컬렉션별 최대 결과 비율 (n_results / 컬렉션 수 대비)
+CANCELLED_MESSAGE = "⏹️ 질문이 취소되었습니다."
+
+# 프로세스 간 공유 캐시 보관 시간 (초, 컬렉션 내용이 바뀌면 키가 달라져 자동으로 새로 계산)
+RETRIEVAL_CACHE_TTL = 3600          # 기사 검색 결과
+ANSWER_CACHE_TTL = 86400            # 생성된 답변
+
+# OpenAI 요청 제한 (프로세스 전체, 동시 실행 수는 CHAT_MAX_WORKERS)
+LLM_TOKENS_PER_MINUTE = 200_000     # 분당 예상 토큰 한도
+LLM_MAX_QUEUE = 20                  # 이보다 많이 밀려 있으면 간단한 응답으로 대체
+LLM_QUEUE_TIMEOUT = 45              # 답변 생성 차례를 기다리는 최대 시간 (초)
+# 같은 질문의 답변을 기다리는 최대 시간 (먼저 온 요청의 검색 + 대기열 + 답변 생성 시간, 초)
+CHAT_WAIT_TIMEOUT = RETRIEVAL_TIMEOUT + LLM_QUEUE_TIMEOUT + LLM_TIMEOUT + 15
+LLM_MAX_OUTPUT_TOKENS = 1500
+QUICK_MAX_OUTPUT_TOKENS = 400       # 기사 검색 없이 답하는 간단한 질문의 최대 출력 토큰
+OVERLOADED_NOTE = "_⚠️ 지금 질문이 많아 AI 분석 대신 관련 기사 검색 결과로 답변드립니다. 잠시 후 다시 질문해주세요._"
+
+# 대화 이력 한도 설정 (세션당)
+CHAT_HISTORY_MAX_MESSAGES = 60      # 보관할 최대 메시지 수
+CHAT_HISTORY_MAX_CHARS = 200_000    # 보관할 메시지 본문 총 글자 수 (세션 메모리 예산)
+CHAT_ARCHIVE_MAX_ITEMS = 30         # 요약으로 남길 이전 질문 수
+CHAT_RENDER_WINDOW = 10             # 기본으로 화면에 표시할 최근 메시지 수
+
+# 예시 질문 (답변은 백그라운드에서 미리 생성)
+EXAMPLE_QUESTIONS = [
+    "가장 최근에 발표된 금연 정책에는 어떤 내용이 포함되어 있나요?",
+    "흡연 부스 설치가 민원 감소에 효과가 있었나요?",
+    "담배와 관련된 건강 피해는 어느 정도인가요?",
+    "금연 팁을 알려주세요!"
+]
+PRECOMPUTE_MAX_WORKERS = 1  # 미리 답변 생성용 워커 수 (사용자 요청 처리와 자원을 나누지 않도록 별도 풀)
+
 ## --- 유틸 함수 ---
 @st.cache_resource
 def init_chroma_client():
@@ -31,57 +94,211 @@ def get_available_collections():
     """사용 가능한 컬렉션 목록 가져오기"""
     try:
         client = init_chroma_client()
-        return [col.name for col in client.list_collections()]
+        # HNSW 재구축용 임시/이전 컬렉션은 선택 목록에서 제외
+        return [col.name for col in client.list_collections() if not is_internal_collection(col.name)]
     except Exception as e:
         st.error(f"컬렉션 목록 로드 오류: {e}")
         return []
 
+@st.cache_resource
+def get_query_embedding_function():
+    """질의 임베딩 함수 (Chroma 검색, 전수 검색, 질문 분류기가 같은 함수 사용)"""
+    return get_embedding_function()
+
+@st.cache_resource
+def load_collection(collection_name):
+    """컬렉션 핸들 캐싱 (실패 시 예외가 그대로 전달되어 캐시되지 않음)"""
+    client = init_chroma_client()
+    return client.get_collection(name=collection_name, embedding_function=get_query_embedding_function())
+
 def get_collection(collection_name):
     """벡터 데이터베이스에서 컬렉션 가져오기"""
     if not collection_name:
         return None
     try:
-        client = init_chroma_client()
-        collection = client.get_collection(name=collection_name)
-        return collection
+        return load_collection(collection_name)
     except Exception as e:
         st.error(f"컬렉션 가져오기 오류: {e}")
         return None
 
-def search_vector_db(collection, query, n_results=20):
-    """벡터 데이터베이스 검색 함수"""
+@st.cache_resource
+def get_chat_executor():
+    """챗봇 요청을 처리하는 프로세스 공용 워커 풀 (답변 생성 대기열에 있는 요청까지 수용)"""
+    return ThreadPoolExecutor(max_workers=CHAT_MAX_WORKERS + LLM_MAX_QUEUE, thread_name_prefix="chat")
+
+@st.cache_resource
+def get_llm_governor():
+    """OpenAI 요청 동시 실행 수 / 분당 토큰 제한 대기열 (프로세스 공용)"""
+    return LLMGovernor(
+        max_in_flight=CHAT_MAX_WORKERS,
+        tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+        max_queue=LLM_MAX_QUEUE,
+        queue_timeout=LLM_QUEUE_TIMEOUT,
+    )
+
+@st.cache_resource
+def get_retrieval_executor():
+    """기사 검색 단계 전용 워커 풀 (단계별 타임아웃 적용용)"""
+    return ThreadPoolExecutor(max_workers=CHAT_MAX_WORKERS, thread_name_prefix="retrieval")
+
+@st.cache_resource
+def get_shard_executor():
+    """컬렉션별 병렬 검색용 워커 풀"""
+    return ThreadPoolExecutor(max_workers=CHAT_MAX_WORKERS * 2, thread_name_prefix="shard")
+
+@st.cache_resource
+def get_precompute_executor():
+    """예시/추천 질문 답변을 미리 만드는 워커 풀"""
+    return ThreadPoolExecutor(max_workers=PRECOMPUTE_MAX_WORKERS, thread_name_prefix="precompute")
+
+@st.cache_resource
+def get_answer_store():
+    """미리 만든 답변 저장소 (프로세스 공용)"""
+    return PrecomputedAnswerStore()
+
+@st.cache_resource
+def get_precompute_inflight():
+    """생성 중인 답변 키 목록 (같은 답변을 중복 생성하지 않도록)"""
+    return set(), threading.Lock()
+
+@st.cache_resource
+def load_vector_index(collection_name, exported_at):
+    """메모리 매핑 검색 인덱스 (exported_at은 다시 내보냈을 때 캐시 갱신용)"""
+    return MmapVectorIndex(collection_name)
+
+@st.cache_data(ttl=VECTOR_INDEX_CHECK_TTL, show_spinner=False)
+def is_vector_index_current(collection_name, fingerprint):
+    """내보낸 인덱스가 현재 컬렉션 내용과 같은지 (전체 내용 해시라 TTL 동안 한 번만 계산)"""
+    return collection_fingerprint(load_collection(collection_name)) == fingerprint
+
+def get_vector_index(collection):
+    """numpy 검색 엔진을 쓸 수 있으면 인덱스 반환 (내보낸 뒤 컬렉션 내용이 바뀌었으면 None → Chroma 사용)"""
+    if RETRIEVAL_BACKEND != "numpy":
+        return None
+    manifest = load_manifest(collection.name)
+    if manifest is None or not manifest.get("fingerprint"):
+        return None
+    if not is_vector_index_current(collection.name, manifest["fingerprint"]):
+        return None
+    return load_vector_index(collection.name, manifest["exported_at"])
+
+@st.cache_resource
+def get_chat_flight():
+    """동시에 들어온 같은 질문을 한 번만 처리하기 위한 single-flight (프로세스 공용)"""
+    return SingleFlight()
+
+@st.cache_resource
+def get_query_router():
+    """질문 유형 분류기 (임베딩 함수를 쓸 수 없으면 키워드 규칙만 사용)"""
+    try:
+        return QueryRouter(get_query_embedding_function())
+    except Exception:
+        return QueryRouter()
+
+class ChatJob:
+    """백그라운드 워커에서 처리되는 챗봇 요청 한 건"""
+
+    def __init__(self, question):
+        self.question = question
+        self.stage = "대기열 등록"
+        self.submitted_at = time.time()
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """취소 요청 (아직 시작 전이면 워커 풀에서 제거, 실행 중이면 다음 단계 전에 중단)"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result_message(self):
+        """완료된 작업의 결과를 대화 이력에 넣을 메시지로 변환"""
+        if self.cancelled or self.future.cancelled():
+            return CANCELLED_MESSAGE
+        error = self.future.exception()
+        if error is not None:
+            return f"분석 중 오류가 발생했습니다: {error}"
+        answer, _ = self.future.result()
+        return answer or CANCELLED_MESSAGE
+
+def merge_filter_info(infos):
+    """여러 컬렉션의 필터 정보 합치기 (기간 필터는 모든 컬렉션에 날짜 인덱스가 있을 때만 사용)"""
+    latest_dates = [info["latest_date"] for info in infos if info["latest_date"]]
+    return {
+        "sources": sorted({source for info in infos for source in info["sources"]}),
+        "latest_date": max(latest_dates) if latest_dates else None,
+        "has_date_index": bool(infos) and all(info["has_date_index"] for info in infos),
+    }
+
+@st.cache_data(ttl=300)
+def get_collection_filter_info(collection_name):
+    """컬렉션 메타데이터에서 필터에 쓸 언론사 목록과 날짜 인덱스 정보 수집"""
+    info = {"sources": [], "latest_date": None, "has_date_index": False}
+    collection = get_collection(collection_name)
+    if not collection:
+        return info
+    try:
+        metadatas = collection.get(include=["metadatas"])["metadatas"]
+    except Exception as e:
+        st.warning(f"메타데이터 확인 중 오류: {e}")
+        return info
+
+    info["sources"] = sorted({m["source"] for m in metadatas if m and m.get("source")})
+    dates = [m[DATE_INDEX_KEY] for m in metadatas if m and isinstance(m.get(DATE_INDEX_KEY), int)]
+    if dates:
+        info["latest_date"] = int_to_date(max(dates))
+        info["has_date_index"] = True
+    return info
+
+def search_vector_db(collection, query, n_results=20, where=None):
+    """벡터 데이터베이스 검색 함수 (where가 주어지면 메타데이터 조건으로 후보를 먼저 좁힘)"""
     try:
         if not collection:
             return [{"content": "컬렉션을 불러올 수 없습니다. 컬렉션을 선택해주세요.", "title": "오류", "metadata": {}}]
        
-        results = collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
+        vector_index = get_vector_index(collection)
+        if vector_index is not None:
+            query_embeddings = get_query_embedding_function()([query])
+            results = vector_index.query(query_embeddings, n_results=n_results, where=where)
+        else:
+            query_kwargs = {"query_texts": [query], "n_results": n_results}
+            if where:
+                query_kwargs["where"] = where
+            results = collection.query(**query_kwargs)
        
         documents = []
         for i in range(len(results['documents'][0])):
             document = {
                 "content": results['documents'][0][i],
                 "title": results['metadatas'][0][i].get('title', '제목 없음'),
-                "metadata": results['metadatas'][0][i]
+                "metadata": results['metadatas'][0][i],
+                "distance": results['distances'][0][i],
+                "collection": collection.name
             }
             documents.append(document)
        
         return documents
     except Exception as e:
-        st.error(f"검색 오류: {e}")
+        # 검색 워커 스레드에서 실행되므로 화면 출력 대신 오류 문서로 반환 (답변 단계에서 안내)
         return [{"content": f"검색 중 오류 발생: {e}", "title": "오류", "metadata": {}}]
 
-def get_gpt_response(query, search_results, api_key, model="gpt-4o-mini"):
-    """OpenAI를 활용한 응답 생성 함수"""
+def get_gpt_response(query, search_results, api_key, model="gpt-4o-mini", timeout=None):
+    """OpenAI를 활용한 응답 생성 함수 (반환: (답변, 정상 답변 여부))"""
     if not api_key:
-        return "OpenAI API 키가 설정되지 않았습니다."
+        return "OpenAI API 키가 설정되지 않았습니다.", False
 
     try:
         # OpenAI 클라이언트 초기화
         api_key = api_key.replace('\ufeff', '')
-        client = OpenAI(api_key=api_key)
+        # 자동 재시도를 끄면 전체 대기 시간이 timeout 안에 끝남 (재시도 시 최대 3배)
+        client = OpenAI(api_key=api_key, timeout=timeout, max_retries=0)
        
         # 컨텍스트 구성 (문서 번호 제거)
         context = "다음은 중앙일보에서 수집한 담배 관련 데이터입니다:\n\n"
@@ -183,20 +400,48 @@ def get_gpt_response(query, search_results, api_key, model="gpt-4o-mini"):
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.3,  # 더 일관된 답변을 위해 낮춤
-            max_tokens=1500    # 더 긴 답변을 위해 늘림
+            max_tokens=LLM_MAX_OUTPUT_TOKENS    # 더 긴 답변을 위해 늘림
         )
        
-        return response.choices[0].message.content
+        return response.choices[0].message.content, True
        
     except Exception as e:
-        error_msg = str(e)
-        if "auth" in error_msg.lower() or "api key" in error_msg.lower():
-            return "OpenAI API 키 인증에 실패했습니다. API 키를 확인해주세요."
-        else:
-            return f"분석 중 오류가 발생했습니다: {error_msg}"
+        return format_openai_error(e, timeout), False
+
+def format_openai_error(error, timeout=None):
+    """OpenAI 호출 오류를 사용자에게 보여줄 메시지로 변환"""
+    error_msg = str(error)
+    if "auth" in error_msg.lower() or "api key" in error_msg.lower():
+        return "OpenAI API 키 인증에 실패했습니다. API 키를 확인해주세요."
+    elif "timed out" in error_msg.lower() or "timeout" in error_msg.lower():
+        return f"⏱️ 답변 생성이 {timeout}초 안에 끝나지 않았습니다. 잠시 후 다시 시도해주세요."
+    else:
+        return f"분석 중 오류가 발생했습니다: {error_msg}"
 
-def get_simple_response(query, search_results):
-    """API 키가 없을 때 간단한 응답을 반환하는 함수"""
+def get_quick_response(query, api_key, model="gpt-4o-mini", timeout=None):
+    """기사 없이 짧게 답하는 간단한 질문(팁/조언/일반 상식)용 응답 생성 함수 (반환: (답변, 정상 답변 여부))"""
+    try:
+        client = OpenAI(api_key=api_key.replace('\ufeff', ''), timeout=timeout, max_retries=0)
+        system_prompt = """당신은 담배, 흡연, 금연에 대해 안내하는 상담 도우미입니다.
+        사용자 질문에 2-5문장으로 간결하고 실용적으로 답변해주세요.
+        기사 링크나 참고 기사 섹션은 포함하지 마세요. 올해는 2025년입니다.
+        """
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": query}
+            ],
+            temperature=0.3,
+            max_tokens=QUICK_MAX_OUTPUT_TOKENS
+        )
+        return response.choices[0].message.content, True
+
+    except Exception as e:
+        return format_openai_error(e, timeout), False
+
+def get_simple_response(query, search_results, api_key_hint=True):
+    """API 키가 없을 때(또는 대기열이 넘칠 때) 검색 결과를 그대로 보여주는 간단한 응답 (api_key_hint: 키 입력 안내 포함)"""
     if not search_results or search_results[0].get("title") == "오류":
         return "관련 데이터를 찾을 수 없습니다."
    
@@ -215,19 +460,351 @@ def get_simple_response(query, search_results):
             content = content[:150] + "..."
         result_text += f"{content}\n\n"
    
-    result_text += "더 자세한 분석을 위해서는 OpenAI API 키를 입력해주세요."
+    if api_key_hint:
+        result_text += "더 자세한 분석을 위해서는 OpenAI API 키를 입력해주세요."
     return result_text
 
-def chat_response(question, collection):
-    """챗봇 응답 생성 함수"""
-    # 벡터 데이터베이스 검색
-    search_results = search_vector_db(collection, question)
-   
-    # ChatGPT API 키가 있으면 GPT 사용, 없으면 간단한 응답
+def federated_search(collections, query, n_results=20, where=None, per_collection_quota=None):
+    """
+    여러 컬렉션을 병렬로 검색한 뒤 거리(유사도) 기준으로 결과를 병합하는 함수
+
+    각 컬렉션에서는 per_collection_quota 개까지만 가져오므로 한 컬렉션이 결과를 독점하지 않습니다.
+    """
+    if len(collections) == 1:
+        return search_vector_db(collections[0], query, n_results, where)
+
+    quota = per_collection_quota or max(1, math.ceil(n_results * FEDERATED_QUOTA_RATIO / len(collections)))
+    futures = [
+        get_shard_executor().submit(search_vector_db, collection, query, min(quota, n_results), where)
+        for collection in collections
+    ]
+
+    merged, errors = [], []
+    for future in futures:
+        for document in future.result():
+            if "distance" in document:
+                merged.append(document)
+            else:
+                errors.append(document)
+
+    # 모든 컬렉션에서 오류가 난 경우에만 오류 문서 반환
+    if not merged and errors:
+        return errors[:1]
+
+    merged.sort(key=lambda document: document["distance"])
+    return merged[:n_results]
+
+def search_with_filters(collections, query, date_range=None, sources=None):
+    """기간/언론사 필터를 적용해 검색하고, 조건에 맞는 기사가 없으면 전체 검색으로 대체"""
+    where = build_where_clause(date_range, sources)
+    if where is None:
+        return federated_search(collections, query), ""
+
+    description = describe_filters(date_range, sources)
+    search_results = federated_search(collections, query, where=where)
+    if search_results:
+        return search_results, f"_🔎 검색 범위: {description}_"
+    return federated_search(collections, query), f"_🔎 '{description}' 조건에 맞는 기사가 없어 전체 기사에서 찾았습니다._"
+
+def cached_search_with_filters(collections, query, date_range=None, sources=None):
+    """다른 프로세스가 같은 조건으로 검색한 결과가 공유 캐시에 있으면 재사용하는 search_with_filters"""
+    key = make_key(RETRIEVAL_BACKEND, collection_version(collections),
+                   answer_key(query, [c.name for c in collections], date_range, sources))
+    return get_shared_cache().get_or_set(
+        "retrieval", key, lambda: search_with_filters(collections, query, date_range, sources),
+        ttl=RETRIEVAL_CACHE_TTL,
+        # 검색 오류 문서는 저장하지 않음
+        should_cache=lambda result: all("distance" in document for document in result[0])
+    )
+
+def run_governed(tokens, generate, job=None):
+    """대기열 차례를 기다려 generate() 실행 (취소 시 None, 대기열이 넘치면 LLMOverloaded 발생)"""
+    def on_wait(position):
+        if job is not None:
+            job.stage = f"답변 생성 대기 (대기 순서 {position}번)"
+
+    try:
+        with get_llm_governor().slot(tokens, on_wait=on_wait,
+                                     is_cancelled=lambda: job is not None and job.cancelled):
+            if job is not None:
+                job.stage = "답변 생성"
+            return generate()
+    except LLMRequestCancelled:
+        return None
+
+def governed_gpt_response(question, search_results, job=None):
+    """
+    대기열 차례를 기다려 GPT 응답 생성
+
+    Returns:
+        tuple: (답변, 정상 답변 여부) - 대기열이 넘치면 검색 결과 요약으로 대체(저장하지 않음), 취소 시 None
+    """
+    prompt_chars = sum(min(len(result['content']), 80000) + len(result['title']) for result in search_results)
+    tokens = estimate_tokens(prompt_chars, LLM_MAX_OUTPUT_TOKENS)
+    try:
+        return run_governed(
+            tokens, lambda: get_gpt_response(question, search_results, OPENAI_API_KEY, timeout=LLM_TIMEOUT), job)
+    except LLMOverloaded:
+        # API 키는 설정되어 있으므로 키 입력 안내 없이 검색 결과만 표시
+        return f"{OVERLOADED_NOTE}\n\n{get_simple_response(question, search_results, api_key_hint=False)}", False
+
+def chat_response(question, collections, job=None, date_range=None, sources=None):
+    """
+    챗봇 응답 생성 함수 (job이 주어지면 진행 단계를 기록하고 취소 여부를 확인)
+
+    Returns:
+        tuple: (답변, 정상 답변 여부) - 오류/시간 초과/대기열 초과 안내는 False (미리 생성/공유 캐시에 저장하지 않음),
+               취소 시 (None, False)
+    """
+    # 가격/흡연율 같은 간단한 사실 질문은 추출해 둔 사실 표에서 바로 답변 (python -m utils.fact_extractor build)
+    fact_answer = answer_from_facts(question, date_range=date_range, sources=sources)
+    if fact_answer:
+        # 질문에 연도가 있으면 기간 필터 대신 그 연도로 찾았으므로 기간은 표시하지 않음
+        description = describe_filters(fact_date_range(detect_fact_question(question), date_range), sources)
+        return (f"_🔎 검색 범위: {description}_\n\n{fact_answer}" if description else fact_answer), True
+
+    # 팁/조언 같은 간단한 질문은 기사 검색 없이 짧은 답변 (검색 조건이 있으면 기사 검색)
+    if OPENAI_API_KEY and not date_range and not sources and collections:
+        route, _ = get_query_router().route(question)
+        if route == SIMPLE:
+            try:
+                return run_governed(
+                    estimate_tokens(len(question), QUICK_MAX_OUTPUT_TOKENS),
+                    lambda: get_quick_response(question, OPENAI_API_KEY, timeout=LLM_TIMEOUT), job) or (None, False)
+            except LLMOverloaded:
+                pass    # 대기열이 넘치면 아래에서 기사 검색 결과로 대체
+
+    # 벡터 데이터베이스 검색 (검색 단계 타임아웃 적용)
+    if job is not None:
+        job.stage = "관련 기사 검색"
+    future = get_retrieval_executor().submit(cached_search_with_filters, collections, question, date_range, sources)
+    try:
+        search_results, filter_note = future.result(timeout=RETRIEVAL_TIMEOUT)
+    except FutureTimeoutError:
+        return f"⏱️ 기사 검색이 {RETRIEVAL_TIMEOUT}초 안에 끝나지 않았습니다. 잠시 후 다시 시도해주세요.", False
+
+    # 검색 도중 취소된 경우 답변 생성 생략
+    if job is not None and job.cancelled:
+        return None, False
+
+    # 검색 오류(워커 스레드에서 반환된 오류 문서)는 답변 대신 그대로 안내
+    if search_results and "distance" not in search_results[0]:
+        return f"⚠️ {search_results[0]['content']}", False
+
+    # ChatGPT API 키가 있으면 GPT 사용 (프로세스 전체 대기열 순서대로), 없으면 간단한 응답
     if OPENAI_API_KEY:
-        return get_gpt_response(question, search_results, OPENAI_API_KEY)
+        result = governed_gpt_response(question, search_results, job)
+        if result is None:
+            return None, False
+        response, ok = result
     else:
-        return get_simple_response(question, search_results)
+        # 검색 결과가 없을 때의 안내는 컬렉션이 채워지면 달라지므로 저장하지 않음
+        response, ok = get_simple_response(question, search_results), bool(search_results)
+
+    # 적용된 검색 범위 안내
+    if filter_note:
+        response = f"{filter_note}\n\n{response}"
+    return response, ok
+
+def precompute_answer(key, version, question, collections, date_range, sources):
+    """답변 하나를 생성해 저장소에 기록 (오류/시간 초과/대기열 초과 응답은 저장하지 않음)"""
+    inflight, lock = get_precompute_inflight()
+    try:
+        answer, ok = coalesced_chat_response(question, collections, None, date_range, sources)
+        if ok:
+            get_answer_store().put(key, version, answer)
+    finally:
+        with lock:
+            inflight.discard((key, version))
+
+def warm_precomputed_answers(questions, collections, filter_info, version):
+    """현재 컬렉션 버전의 답변이 없는 질문만 백그라운드 생성 요청"""
+    store = get_answer_store()
+    inflight, lock = get_precompute_inflight()
+    names = [collection.name for collection in collections]
+    default_filters = {"auto_detect": True, "date_range": None, "sources": []}
+
+    for question in questions:
+        date_range, sources = resolve_search_filters(question, filter_info, default_filters)
+        key = answer_key(question, names, date_range, sources)
+        if store.get(key, version) is not None:
+            continue
+        with lock:
+            if (key, version) in inflight:
+                continue
+            inflight.add((key, version))
+        get_precompute_executor().submit(
+            precompute_answer, key, version, question, collections, date_range, sources)
+
+def answer_version(collections):
+    """답변 버전 (API 키 유무에 따라 답변 형식이 달라지므로 포함)"""
+    return collection_version(collections) + ("-gpt" if OPENAI_API_KEY else "-simple")
+
+def coalesced_chat_response(question, collections, job=None, date_range=None, sources=None):
+    """
+    같은 질문/검색 조건의 요청이 처리 중이면 그 답변을 함께 받는 chat_response
+
+    먼저 요청한 사용자가 취소해 답변이 없으면, 기다리던 요청이 다시 처리합니다.
+    다른 프로세스가 만든 같은 답변이 공유 캐시에 있으면 바로 반환합니다.
+
+    Returns:
+        tuple: chat_response 와 같은 (답변, 정상 답변 여부)
+    """
+    key = answer_key(question, [c.name for c in collections], date_range, sources)
+    cache = get_shared_cache()
+    cache_key = make_key(key, answer_version(collections))
+    cached = cache.get("chat_answer", cache_key)
+    if cached is not None:
+        return cached, True
+
+    def on_wait():
+        if job is not None:
+            job.stage = "같은 질문의 답변 생성 대기"
+
+    while True:
+        try:
+            (response, ok), shared = get_chat_flight().do(
+                key, chat_response, (question, collections, job, date_range, sources), on_wait=on_wait,
+                is_cancelled=lambda: job is not None and job.cancelled, timeout=CHAT_WAIT_TIMEOUT)
+        except SingleFlightCancelled:
+            return None, False
+        except SingleFlightTimeout:
+            return f"⏱️ 같은 질문의 답변이 {CHAT_WAIT_TIMEOUT}초 안에 끝나지 않았습니다. 잠시 후 다시 시도해주세요.", False
+        if ok and not shared:
+            cache.set("chat_answer", cache_key, response, ttl=ANSWER_CACHE_TTL)
+        if response is not None or not shared or (job is not None and job.cancelled):
+            return response, ok
+
+def init_chat_state():
+    """대화 관련 세션 상태 초기화"""
+    st.session_state.chat_history = []
+    st.session_state.chat_history_chars = 0
+    st.session_state.chat_archive = []
+    st.session_state.chat_archived_count = 0
+    st.session_state.chat_window = CHAT_RENDER_WINDOW
+
+def append_chat_message(role, content):
+    """대화 이력에 메시지를 추가하고, 한도를 넘으면 오래된 대화를 요약으로 정리"""
+    history = st.session_state.chat_history
+    history.append({"role": role, "content": content})
+    st.session_state.chat_history_chars += len(content)
+
+    # 메시지 수 또는 글자 수 한도 초과 시 가장 오래된 메시지부터 정리 (최근 한 턴은 유지)
+    while len(history) > 2 and (
+        len(history) > CHAT_HISTORY_MAX_MESSAGES
+        or st.session_state.chat_history_chars > CHAT_HISTORY_MAX_CHARS
+    ):
+        old = history.pop(0)
+        st.session_state.chat_history_chars -= len(old["content"])
+        st.session_state.chat_archived_count += 1
+
+        # 질문만 한 줄 요약으로 남기고 답변 본문은 버림
+        if old["role"] == "user":
+            summary = old["content"] if len(old["content"]) <= 60 else old["content"][:60] + "..."
+            st.session_state.chat_archive.append(summary)
+            del st.session_state.chat_archive[:-CHAT_ARCHIVE_MAX_ITEMS]
+
+def render_chat_history():
+    """최근 메시지 구간만 표시 (이전 대화는 요청 시 추가로 표시)"""
+    history = st.session_state.chat_history
+
+    # 한도 초과로 정리된 이전 대화 요약
+    if st.session_state.chat_archived_count:
+        with st.expander(f"📜 이전 대화 요약 (정리된 메시지 {st.session_state.chat_archived_count}개)"):
+            for summary in st.session_state.chat_archive:
+                st.markdown(f"- {summary}")
+
+    window = min(st.session_state.chat_window, len(history))
+    hidden = len(history) - window
+    if hidden > 0:
+        if st.button(f"⬆️ 이전 대화 더 보기 ({hidden}개)", key="load_earlier_chat"):
+            st.session_state.chat_window += CHAT_RENDER_WINDOW
+            st.rerun()
+
+    for message in history[hidden:]:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+def submit_chat_job(question, collections, date_range=None, sources=None):
+    """챗봇 요청을 워커 풀에 제출하고 작업 핸들 반환"""
+    job = ChatJob(question)
+    job.future = get_chat_executor().submit(coalesced_chat_response, question, collections, job, date_range, sources)
+    return job
+
+def render_search_filters(filter_info):
+    """검색 필터 UI (기간/언론사 직접 선택 또는 질문에서 자동 감지)"""
+    with st.expander("🔎 검색 필터", expanded=False):
+        auto_detect = st.checkbox(
+            "질문에서 기간·언론사 자동 감지",
+            value=True,
+            help="'최근', '작년', '2024년' 같은 표현이나 언론사 이름이 질문에 있으면 해당 기사만 검색합니다"
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            date_range = st.date_input(
+                "기간",
+                value=(),
+                disabled=not filter_info["has_date_index"],
+                help="비워두면 기간 제한 없이 검색합니다"
+            )
+        with col2:
+            sources = st.multiselect(
+                "언론사",
+                options=filter_info["sources"],
+                disabled=not filter_info["sources"]
+            )
+
+        if not filter_info["has_date_index"]:
+            st.caption("컬렉션에 날짜 인덱스가 없어 기간 필터를 사용할 수 없습니다. "
+                       "`python -m utils.news_filters` 를 실행해 인덱스를 추가하세요.")
+
+    # 시작일/종료일이 모두 선택된 경우에만 기간 필터 적용
+    if not isinstance(date_range, (tuple, list)) or len(date_range) != 2:
+        date_range = None
+    return {"auto_detect": auto_detect, "date_range": date_range, "sources": sources}
+
+def resolve_search_filters(question, filter_info, ui_filters):
+    """직접 선택한 필터를 우선 적용하고, 비어 있는 조건은 질문에서 자동 감지"""
+    date_range = ui_filters["date_range"]
+    sources = ui_filters["sources"]
+
+    if ui_filters["auto_detect"]:
+        if not date_range and filter_info["latest_date"]:
+            # 상대 기간은 컬렉션의 가장 최근 기사 날짜를 기준으로 계산
+            date_range = detect_date_range(question, filter_info["latest_date"])
+        if not sources:
+            sources = detect_sources(question, filter_info["sources"])
+
+    if not filter_info["has_date_index"]:
+        date_range = None
+    return date_range, sources
+
+@st.fragment(run_every=CHAT_POLL_INTERVAL)
+def render_pending_chat():
+    """처리 중인 요청 상태를 주기적으로 확인하여 완료되면 대화 이력에 반영"""
+    job = st.session_state.get("pending_chat")
+    if job is None:
+        return
+
+    if job.done():
+        append_chat_message("assistant", job.result_message())
+        st.session_state.pending_chat = None
+        st.session_state.is_processing = False
+        st.rerun()
+
+    # 처리 중일 때 상태 표시 + 취소 버튼
+    elapsed = time.time() - job.submitted_at
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        st.info(f"💭 {job.stage} 중입니다... ({elapsed:.0f}초 경과) 다른 탭을 둘러보셔도 답변은 계속 준비됩니다.")
+    with col2:
+        if st.button("⏹️ 질문 취소", key="cancel_chat", use_container_width=True):
+            job.cancel()
+            append_chat_message("assistant", CANCELLED_MESSAGE)
+            st.session_state.pending_chat = None
+            st.session_state.is_processing = False
+            st.rerun()
 
 def news_chatbot():
     """담배 관련 뉴스 챗봇 메인 함수"""
@@ -244,40 +821,58 @@ def news_chatbot():
         st.warning("사용 가능한 컬렉션이 없습니다.")
         return
 
-    # 첫 번째 컬렉션 자동 선택 (다른 탭들과 일관성 유지)
-    collection_name = collection_list[0]
-    
+    # 검색할 컬렉션 선택 (기본: 전체 컬렉션을 병렬 검색)
+    if len(collection_list) > 1:
+        collection_names = st.multiselect(
+            "검색할 컬렉션",
+            options=collection_list,
+            default=collection_list,
+            help="선택한 모든 컬렉션을 동시에 검색한 뒤 유사도 순으로 결과를 합칩니다"
+        )
+    else:
+        collection_names = collection_list
+
     # 컬렉션 가져오기
-    collection = get_collection(collection_name)
+    collections = [c for c in (get_collection(name) for name in collection_names) if c]
 
     # 컬렉션 정보 표시
-    if collection:
+    if collections:
         try:
-            count = collection.count()
-            st.success(f"컬렉션 '{collection_name}'에서 {count:,}개의 문서를 불러왔습니다.")
+            count = sum(collection.count() for collection in collections)
+            names = ", ".join(f"'{collection.name}'" for collection in collections)
+            st.success(f"컬렉션 {names}에서 {count:,}개의 문서를 불러왔습니다.")
         except Exception as e:
             st.warning(f"컬렉션 정보 확인 중 오류: {e}")
     else:
         st.warning("컬렉션을 선택하거나 찾을 수 없습니다. 컬렉션 목록을 확인하세요.")
         return
 
+    # 검색 필터
+    filter_info = merge_filter_info([get_collection_filter_info(c.name) for c in collections])
+    ui_filters = render_search_filters(filter_info)
+
     # 세션 상태 초기화
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+        init_chat_state()
     if "is_processing" not in st.session_state:
         st.session_state.is_processing = False
+    if "pending_chat" not in st.session_state:
+        st.session_state.pending_chat = None
 
     # 예시 질문 섹션
     st.markdown(
         "<p style='font-size:20px; font-weight:600;'>💡 예시 질문</p>", 
         unsafe_allow_html=True
     )
-    example_questions = [
-        "가장 최근에 발표된 금연 정책에는 어떤 내용이 포함되어 있나요?",
-        "흡연 부스 설치가 민원 감소에 효과가 있었나요?",
-        "담배와 관련된 건강 피해는 어느 정도인가요?",
-        "금연 팁을 알려주세요!"
-    ]
+    example_questions = EXAMPLE_QUESTIONS
+
+    # 예시/추천 질문 답변 미리 생성 (컬렉션이 바뀌면 다시 생성)
+    try:
+        version = answer_version(collections)
+        warm_precomputed_answers(example_questions + load_featured_questions(), collections, filter_info, version)
+    except Exception as e:
+        version = None
+        st.warning(f"예시 질문 답변 준비 중 오류: {e}")
 
     # 예시 질문을 4열로 배치 (처리 중일 때는 비활성화)
     cols = st.columns(4)
@@ -289,16 +884,14 @@ def news_chatbot():
 
     # 대화 기록 초기화 버튼 (처리 중일 때는 비활성화)
     if st.button("🗑️ 대화 기록 초기화", disabled=st.session_state.is_processing):
-        st.session_state.chat_history = []
+        init_chat_state()
         st.session_state.is_processing = False
         st.rerun()
 
     st.divider()
 
-    # 이전 대화 내용 표시
-    for message in st.session_state.chat_history:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # 이전 대화 내용 표시 (최근 구간만)
+    render_chat_history()
 
     # 예시 질문 버튼 클릭 시 처리 (채팅창보다 먼저 확인)
     if "selected_question" in st.session_state:
@@ -319,39 +912,29 @@ def news_chatbot():
 
     if final_input:
         # 컬렉션이 없으면 오류 메시지 표시
-        if not collection:
+        if not collections:
             with st.chat_message("assistant"):
                 st.markdown("⚠️ 컬렉션을 선택해주세요. 현재 컬렉션이 선택되지 않았거나 찾을 수 없습니다.")
-            st.session_state.chat_history.append({
-                "role": "assistant", 
-                "content": "⚠️ 컬렉션을 선택해주세요. 현재 컬렉션이 선택되지 않았거나 찾을 수 없습니다."
-            })
+            append_chat_message("assistant", "⚠️ 컬렉션을 선택해주세요. 현재 컬렉션이 선택되지 않았거나 찾을 수 없습니다.")
             st.session_state.is_processing = False
         else:
-            # 사용자 메시지 표시
-            with st.chat_message("user"):
-                st.markdown(final_input)
-
             # 사용자 메시지를 대화 이력에 저장
-            st.session_state.chat_history.append({"role": "user", "content": final_input})
-
-            # 응답 생성  
-            with st.spinner("질문과 관련된 문서를 수집하여 답변을 준비하고 있는 중..."):
-                response = chat_response(final_input, collection)
-
-            # 응답 메시지 표시
-            with st.chat_message("assistant"):
-                st.markdown(response)
-
-            # AI 응답을 대화 이력에 저장
-            st.session_state.chat_history.append({"role": "assistant", "content": response})
-            
-            # 처리 완료 후 상태 초기화
-            st.session_state.is_processing = False
+            append_chat_message("user", final_input)
+            st.session_state.chat_window = CHAT_RENDER_WINDOW
+
+            # 미리 만든 답변이 있으면 바로 표시, 없으면 워커 풀에서 처리 (결과는 render_pending_chat에서 반영)
+            date_range, sources = resolve_search_filters(final_input, filter_info, ui_filters)
+            key = answer_key(final_input, [c.name for c in collections], date_range, sources)
+            precomputed = get_answer_store().get(key, version) if version else None
+            if precomputed:
+                append_chat_message("assistant", precomputed)
+                st.session_state.is_processing = False
+            else:
+                st.session_state.pending_chat = submit_chat_job(final_input, collections, date_range, sources)
 
         # 페이지 새로고침
         st.rerun()
-    
+
     # 처리 중일 때 상태 표시
-    if st.session_state.is_processing and not final_input:
-        st.info("💭 답변을 생성하고 있습니다. 잠시만 기다려주세요...")
+    if st.session_state.pending_chat is not None:
+        render_pending_chat()
@@ -1,12 +1,139 @@
 # components/tab_map.py
 import os
+import sys
+import json
+from pathlib import Path
 import streamlit as st
-import pandas as pd
 import pydeck as pdk
+import plotly.express as px
+
+# 상위 디렉토리의 utils 모듈 import를 위한 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+from utils.map_data import (
+    TOTAL_LABEL, FACILITY_TYPES, RAW_MAP_DATA_PATH, COMPILED_MAP_DATA_PATH, MAP_TILES_URL,
+    build_district_stats, zoom_for_bbox, compile_smoking_areas, load_map_asset, load_tile_manifest
+)
+from utils.file_hash import file_sha256
+from utils.shared_cache import get_shared_cache
 
 mapbox_token = st.secrets["MAPBOX_API_KEY"]  # 또는 os.environ.get("MAPBOX_API_KEY")
 pdk.settings.mapbox_api_key = mapbox_token
 
+# 점 색상 (전체 보기 / 선택 자치구 / 그 외 자치구)
+ALL_COLOR = [255, 0, 0, 160]
+SELECTED_COLOR = [0, 102, 255, 200]
+OTHER_COLOR = [140, 140, 140, 120]
+
+@st.cache_data
+def load_smoking_area_data():
+    """
+    흡연구역 데이터 로드 (python -m utils.map_data build 로 검증/정제된 빌드 파일 사용)
+
+    Returns:
+        tuple: (DataFrame, 버전 정보 dict - 빌드 파일이 없으면 None)
+    """
+    if os.path.exists(COMPILED_MAP_DATA_PATH):
+        try:
+            data, stamp = load_map_asset(COMPILED_MAP_DATA_PATH)
+            # 원본이 빌드 이후 변경되었는지 표시용
+            if os.path.exists(RAW_MAP_DATA_PATH):
+                stamp["stale"] = file_sha256(RAW_MAP_DATA_PATH) != stamp["source_sha256"]
+            return data, stamp
+        except Exception as e:
+            st.warning(f"빌드된 지도 데이터를 불러오지 못해 원본 CSV를 사용합니다: {e}")
+
+    # 빌드 파일이 없으면 원본을 즉석에서 검증/정제 (느린 경로, 결과는 원본 해시 기준으로 다른 프로세스와 공유)
+    data = get_shared_cache().get_or_set(
+        "map_snapshot", file_sha256(RAW_MAP_DATA_PATH),
+        lambda: compile_smoking_areas(RAW_MAP_DATA_PATH)[0]
+    )
+    return data, None
+
+@st.cache_data
+def get_tile_manifest():
+    """빌드된 지도 타일 정보 (없으면 None)"""
+    return load_tile_manifest()
+
+def build_tile_layer(manifest, selected_district):
+    """정적 GeoJSON 타일 레이어 (브라우저가 현재 화면에 보이는 타일만 요청)"""
+    if selected_district == TOTAL_LABEL:
+        fill_color = ALL_COLOR
+    else:
+        # 타일의 각 점은 properties.gu 에 자치구 이름을 가지고 있음
+        fill_color = (f"properties.gu == {json.dumps(selected_district, ensure_ascii=False)}"
+                      f" ? {SELECTED_COLOR} : {OTHER_COLOR}")
+    return pdk.Layer(
+        'TileLayer',
+        id='smoking-zone-tiles',  # 고정 id로 재실행 시에도 이미 받은 타일 재사용
+        data=MAP_TILES_URL,
+        min_zoom=manifest['min_zoom'],
+        max_zoom=manifest['max_zoom'],
+        extent=manifest['extent'],
+        point_type="'circle'",
+        get_fill_color=fill_color,
+        get_point_radius=40,
+        point_radius_units="'meters'",
+        stroked=False,
+        pickable=True,
+        update_triggers={'getFillColor': [selected_district]},
+    )
+
+def build_scatter_layer(data, selected_district):
+    """전체 데이터를 한 번에 전달하는 레이어 (타일이 없을 때 사용)"""
+    if selected_district == TOTAL_LABEL:
+        # 모두 빨간색
+        data['color'] = [ALL_COLOR] * len(data)
+    else:
+        # 선택된 자치구는 파랑, 나머지는 회색
+        is_selected = (data['자치구'] == selected_district).to_numpy()
+        data['color'] = [SELECTED_COLOR if selected else OTHER_COLOR for selected in is_selected]
+    return pdk.Layer(
+        'ScatterplotLayer',
+        data=data,  # 전체 데이터 사용
+        get_position='[longitude, latitude]',
+        get_color='color',
+        get_radius=40,
+        pickable=True,
+    )
+
+@st.cache_data
+def load_district_stats():
+    """자치구별 통계 테이블 (흡연구역 수, 중심 좌표, 범위, 시설 유형별 개수) - 로드 시 한 번만 계산"""
+    data, _ = load_smoking_area_data()
+    return build_district_stats(data, total_label=TOTAL_LABEL)
+
+def render_district_comparison(district_stats, selected_district):
+    """자치구별 흡연구역 수를 시설 유형별 누적 막대 그래프로 비교"""
+    by_district = district_stats.drop(index=TOTAL_LABEL)
+    chart_data = (
+        by_district[FACILITY_TYPES]
+        .reset_index()
+        .melt(id_vars='자치구', var_name='시설유형', value_name='흡연구역수')
+    )
+
+    fig = px.bar(
+        chart_data,
+        x='자치구',
+        y='흡연구역수',
+        color='시설유형',
+        category_orders={'자치구': by_district.index.tolist(), '시설유형': FACILITY_TYPES},
+        title='📊 자치구별 흡연구역 수 비교'
+    )
+    fig.update_layout(
+        xaxis_title="자치구",
+        yaxis_title="흡연구역 수",
+        plot_bgcolor='white',
+        legend_title_text='시설 유형',
+        height=450
+    )
+
+    # 선택한 자치구 강조
+    if selected_district in by_district.index:
+        position = by_district.index.get_loc(selected_district)
+        fig.add_vrect(x0=position - 0.5, x1=position + 0.5, fillcolor="#0066ff", opacity=0.12, line_width=0)
+
+    st.plotly_chart(fig, use_container_width=True)
+
 def smoking_zone_map():
     # 제목 + 설명
     st.markdown("## 서울시 흡연구역 지도🗺️")
@@ -19,42 +146,56 @@ def smoking_zone_map():
     현장 상황에 따라 흡연이 제한될 수 있으므로, 이용 전 참고하시기 바랍니다.
     """)
 
-    # 데이터 로드
-    data = pd.read_csv('data/smoking_areas.csv', encoding='cp949')
-    data = data.rename(columns={'자치구명': '자치구', '시설구분': '장소', '위도': 'latitude', '경도': 'longitude'})
-    data['latitude'] = pd.to_numeric(data['latitude'], errors='coerce')
-    data['longitude'] = pd.to_numeric(data['longitude'], errors='coerce')
+    # 데이터 로드 (자치구별 통계는 로드 시 한 번만 계산)
+    data, stamp = load_smoking_area_data()
+    district_stats = load_district_stats()
 
     # 본문 영역에 selectbox 넣기
-    districts = ['전체 보기'] + sorted(data['자치구'].dropna().unique().tolist())
-    selected_district = st.selectbox("자치구를 선택하세요", districts)
-
-    # 색상 강조 컬럼 추가
-    if selected_district == "전체 보기":
-        # 모두 빨간색
-        data['color'] = [[255, 0, 0, 160]] * len(data)
-    else:
-        # 선택된 자치구는 파랑, 나머지는 회색
-        data['color'] = data['자치구'].apply(
-            lambda gu: [0, 102, 255, 200] if gu == selected_district else [140, 140, 140, 120])
-
-    # 필터링 이후에도 color 컬럼 포함
-    filtered_data = data if selected_district == '전체 보기' else data[data['자치구'] == selected_district]
+    districts = ['전체 보기'] + sorted(district_stats.index.drop(TOTAL_LABEL).tolist())
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        selected_district = st.selectbox("자치구를 선택하세요", districts)
+    with col2:
+        auto_zoom = st.checkbox("자치구 범위에 맞춰 자동 확대", value=True)
+    district_row = district_stats.loc[selected_district]
 
     # 흡연구역 수 표시
-    num_zones = len(filtered_data)
+    num_zones = int(district_row['흡연구역수'])
     if selected_district == "전체 보기":
         st.markdown(f"#### 서울시 전체 흡연구역 수: **{num_zones}곳**")
     else:
         st.markdown(f"#### **{selected_district}**의 흡연구역 수: **{num_zones}곳**")
 
-    # 지도 중심 좌표 계산
-    if selected_district == "전체 보기":
-        center_lat = data['latitude'].mean()
-        center_lon = data['longitude'].mean()
+    # 시설 유형별 개수
+    breakdown = [f"{facility_type} {int(district_row[facility_type])}곳"
+                 for facility_type in FACILITY_TYPES if district_row[facility_type] > 0]
+    st.caption(" · ".join(breakdown))
+
+    # 지도 중심 좌표 및 확대 배율 (자치구별 통계 테이블 사용)
+    center_lat = district_row['중심_위도']
+    center_lon = district_row['중심_경도']
+    if auto_zoom:
+        zoom = zoom_for_bbox(district_row['최소_위도'], district_row['최대_위도'],
+                             district_row['최소_경도'], district_row['최대_경도'])
     else:
-        center_lat = data[data['자치구'] == selected_district]['latitude'].mean()
-        center_lon = data[data['자치구'] == selected_district]['longitude'].mean()
+        zoom = 12
+
+    # 데이터 버전 표시
+    if stamp is None:
+        st.caption("⚠️ 빌드된 지도 데이터가 없어 원본 CSV를 직접 정제했습니다. `python -m utils.map_data build` 를 실행하세요.")
+    elif stamp.get("stale"):
+        st.caption(f"⚠️ 원본 CSV가 빌드({stamp['built_at']}) 이후 변경되었습니다. `python -m utils.map_data build` 로 다시 빌드하세요.")
+
+    # 지도 레이어 (빌드된 타일이 현재 데이터와 같은 원본이면 타일 사용)
+    manifest = get_tile_manifest()
+    min_zoom = 0
+    if manifest and stamp and manifest.get('source_sha256') == stamp['source_sha256']:
+        layer = build_tile_layer(manifest, selected_district)
+        # 타일은 min_zoom 이상에서만 있으므로 그보다 축소하면 점이 모두 사라짐 → 축소 범위 제한
+        min_zoom = manifest['min_zoom']
+        zoom = max(zoom, min_zoom)
+    else:
+        layer = build_scatter_layer(data, selected_district)
 
     # 지도 출력
     if not data.empty:
@@ -63,22 +204,17 @@ def smoking_zone_map():
             initial_view_state=pdk.ViewState(
                 latitude=center_lat,
                 longitude=center_lon,
-                zoom=12,
+                zoom=zoom,
+                min_zoom=min_zoom,
                 pitch=0,
             ),
-            layers=[
-                pdk.Layer(
-                    'ScatterplotLayer',
-                    data=data,  # 전체 데이터 사용
-                    get_position='[longitude, latitude]',
-                    get_color='color',
-                    get_radius=40,
-                    pickable=True,
-                ),
-            ],
+            layers=[layer],
             tooltip={"text": "{장소}\n{주소}"}
         ),
         use_container_width=True,
         height=750)
     else:
         st.warning("선택한 자치구에는 흡연구역 데이터가 없습니다.")
+
+    # 자치구별 비교 그래프 (통계 테이블 사용)
+    render_district_comparison(district_stats, selected_district)
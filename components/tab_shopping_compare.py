@@ -4,13 +4,192 @@
 
 import streamlit as st
 import plotly.express as px
-import pandas as pd
 from pathlib import Path
 import sys
 
 # 상위 디렉토리의 utils 모듈 import를 위한 경로 추가
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.naver_api_shop import search_and_save_shopping_data, get_shopping_data_summary
+from utils.naver_api_shop import search_and_save_shopping_data, get_shopping_data_summary, load_shopping_csv
+from utils.product_matching import summarize_product_groups
+from utils.file_hash import file_sha256
+from utils.watchlist import load_recent_alerts
+from utils.shopping_export import (
+    export_shopping_data, remove_export_file, iter_snapshot_chunks, iter_mall_summary_chunks
+)
+
+# 프로세스 전체에서 공유할 쇼핑 데이터 최대 개수 (파일 내용 기준)
+SHARED_DATA_MAX_ENTRIES = 32
+
+# 내보내기 파일 형식별 MIME 타입
+EXPORT_MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+}
+
+@st.cache_resource(max_entries=SHARED_DATA_MAX_ENTRIES, show_spinner=False)
+def get_shared_shopping_data(file_hash, _file_path):
+    """
+    쇼핑 데이터 파일을 프로세스 전체에서 한 번만 불러와 공유 (파일 내용 해시 기준)
+
+    여러 세션이 같은 파일을 불러와도 DataFrame은 하나만 유지되고, 세션에는 (해시, 경로) 참조만 저장합니다.
+    반환값은 모든 세션이 함께 보는 읽기 전용 객체입니다. 열 추가/값 변경/inplace 정렬 등은 하지 말고,
+    필요하면 필터링 결과나 .copy()에 대해 수정합니다 (세션마다 복사하면 공유하는 의미가 없어짐).
+    """
+    return load_shopping_csv(_file_path)
+
+def set_session_shopping_file(file_path):
+    """현재 세션이 볼 쇼핑 데이터 파일 지정 (DataFrame 대신 참조만 저장)"""
+    file_hash = file_sha256(file_path)
+    get_shared_shopping_data(file_hash, str(file_path))
+    st.session_state['shopping_source'] = (file_hash, str(file_path))
+
+def get_session_shopping_data():
+    """현재 세션의 쇼핑 데이터 (공유 캐시에서 조회한 읽기 전용 DataFrame, 없으면 None)"""
+    if 'shopping_source' not in st.session_state:
+        return None
+    file_hash, file_path = st.session_state['shopping_source']
+    try:
+        return get_shared_shopping_data(file_hash, file_path)
+    except Exception as e:
+        st.error(f"❌ 저장된 데이터를 다시 불러오지 못했습니다: {str(e)}")
+        del st.session_state['shopping_source']
+        return None
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_recent_alerts():
+    """워치리스트 스케줄러가 기록한 최근 가격 알림 (1분마다 갱신)"""
+    return load_recent_alerts()
+
+def render_price_alerts():
+    """워치리스트 가격 알림 표시 (세션 시작 이후 새로 생긴 알림은 토스트로 한 번 더 알림)"""
+    alerts = get_recent_alerts()
+    keys = list(zip(alerts['checked_at'], alerts['query'], alerts['productId'])) if not alerts.empty else []
+
+    # 세션을 처음 열 때 이미 있던 알림은 확인한 것으로 보고 토스트하지 않음
+    if 'seen_price_alerts' not in st.session_state:
+        st.session_state['seen_price_alerts'] = set(keys)
+    if alerts.empty:
+        return
+
+    seen = st.session_state['seen_price_alerts']
+    for alert, key in zip(alerts.itertuples(), keys):
+        if key not in seen:
+            seen.add(key)
+            st.toast(f"🔔 [{alert.query}] {int(alert.new_lprice):,}원 ({alert.mallName})")
+
+    with st.expander(f"🔔 가격 알림 ({len(alerts)}건)", expanded=False):
+        st.dataframe(
+            alerts[['checked_at', 'query', 'title', 'mallName', 'old_lprice', 'new_lprice', 'threshold', 'link']],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "checked_at": "확인 시각",
+                "query": "검색어",
+                "title": "상품명",
+                "mallName": "쇼핑몰",
+                "old_lprice": st.column_config.NumberColumn("이전 최저가", format="%d원"),
+                "new_lprice": st.column_config.NumberColumn("현재 최저가", format="%d원"),
+                "threshold": st.column_config.NumberColumn("알림 기준", format="%d원"),
+                "link": st.column_config.LinkColumn("링크"),
+            }
+        )
+
+def render_product_price_spread(df):
+    """여러 쇼핑몰에서 판매 중인 동일 상품의 가격 차이 비교"""
+    st.markdown("---")
+    st.markdown("<p style='font-size:20px; font-weight:600;'>🔗 쇼핑몰 간 동일 상품 가격 비교</p>", unsafe_allow_html=True)
+
+    group_summary = summarize_product_groups(df)
+    if group_summary.empty:
+        st.info("💡 여러 쇼핑몰에서 함께 판매 중인 동일 상품을 찾지 못했습니다.")
+        return
+
+    st.dataframe(
+        group_summary.drop(columns='상품그룹'),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "최저가": st.column_config.NumberColumn(format="%d원"),
+            "최고가": st.column_config.NumberColumn(format="%d원"),
+            "가격차": st.column_config.NumberColumn(format="%d원"),
+            "가격차율": st.column_config.NumberColumn(format="%.1f%%"),
+        }
+    )
+
+    # 가격 차이가 큰 상품 10개의 쇼핑몰별 가격 분포
+    top_groups = group_summary.head(10)
+    labels = top_groups.set_index('상품그룹')['대표상품명'].map(
+        lambda title: title if len(title) <= 30 else title[:30] + "...")
+    spread_df = df[df['상품그룹'].isin(top_groups['상품그룹']) & (df['lprice'] > 0)].copy()
+    spread_df['상품'] = spread_df['상품그룹'].map(labels)
+
+    fig = px.scatter(
+        spread_df,
+        x='lprice',
+        y='상품',
+        color='mallName',
+        hover_name='title',
+        category_orders={'상품': labels.tolist()},
+        title='📉 상품별 쇼핑몰 가격 분포 (가격 차이 큰 순)'
+    )
+    fig.update_traces(marker=dict(size=12, opacity=0.8, line=dict(width=1, color='white')),
+                      hovertemplate='<b>%{hovertext}</b><br>가격: %{x:,}원')
+    fig.update_layout(
+        xaxis_title="가격",
+        yaxis_title="",
+        xaxis=dict(tickformat=','),
+        plot_bgcolor='white',
+        legend_title_text='쇼핑몰',
+        height=max(350, 60 * len(top_groups))
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_export_section(current_file):
+    """현재 검색 결과/전체 검색 기록/쇼핑몰별 집계를 XLSX, CSV로 내보내기"""
+    st.markdown("---")
+    st.markdown("<p style='font-size:20px; font-weight:600;'>💾 데이터 내보내기</p>", unsafe_allow_html=True)
+
+    history_files = sorted(str(f) for f in Path("data").glob("naver_shopping_*.csv"))
+    export_targets = {
+        "현재 검색 결과": ("current", lambda: iter_snapshot_chunks([current_file])),
+        "저장된 전체 검색 기록": ("history", lambda: iter_snapshot_chunks(history_files)),
+        "쇼핑몰별 집계 (전체 기록)": ("mall_summary", lambda: iter_mall_summary_chunks(history_files)),
+    }
+
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        target = st.selectbox("내보낼 데이터", options=list(export_targets.keys()))
+    with col2:
+        fmt = st.selectbox("파일 형식", options=list(EXPORT_MIME_TYPES.keys()))
+    with col3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        export_button = st.button("📤 파일 만들기", type="primary", use_container_width=True)
+
+    if export_button:
+        name, chunk_factory = export_targets[target]
+        with st.spinner("📤 내보내기 파일을 만드는 중..."):
+            try:
+                file_name, path, rows = export_shopping_data(chunk_factory, f"naver_shopping_{name}", fmt)
+            except Exception as e:
+                st.error(f"❌ 내보내기 중 오류가 발생했습니다: {str(e)}")
+            else:
+                # 세션에는 임시 파일 정보만 보관 (이전 파일은 삭제)
+                previous = st.session_state.get('shopping_export')
+                if previous:
+                    remove_export_file(previous['path'])
+                st.session_state['shopping_export'] = {
+                    "format": fmt, "file_name": file_name, "path": path, "rows": rows}
+
+    export = st.session_state.get('shopping_export')
+    if export and export['path'].exists():
+        # 파일 내용은 다운로드 버튼을 누를 때만 읽음
+        st.download_button(
+            f"📥 {export['format'].upper()} 다운로드 ({export['rows']:,}행)",
+            data=export['path'].read_bytes,
+            file_name=export['file_name'],
+            mime=EXPORT_MIME_TYPES[export['format']],
+            key="download_export",
+        )
 
 def shopping_compare():
     """네이버 쇼핑 가격 비교 탭 내용"""
@@ -44,6 +223,9 @@ def shopping_compare():
     원하는 상품명을 입력하거나, 이전에 저장한 파일을 불러와 쇼핑몰별 가격 차이를 시각적으로 확인할 수 있습니다.
     """)
 
+    # 워치리스트 가격 알림 (python -m utils.watchlist run 으로 별도 실행)
+    render_price_alerts()
+
     # 상품 검색 섹션
     st.markdown("<p style='font-size:20px; font-weight:600;'>🔍 상품 검색</p>", unsafe_allow_html=True)
     
@@ -115,7 +297,7 @@ def shopping_compare():
                     if load_button:
                         try:
                             file_path = data_dir / selected_file
-                            st.session_state['shopping_df'] = pd.read_csv(file_path, index_col=0)
+                            set_session_shopping_file(file_path)
                             st.session_state['file_loaded'] = True
                             st.success(f"✅ {selected_file} 파일을 불러왔습니다!")
                             st.rerun()
@@ -136,8 +318,8 @@ def shopping_compare():
                     save_dir="data"
                 )
                 
-                # 세션 상태에 저장
-                st.session_state['shopping_df'] = df
+                # 세션 상태에는 저장된 파일 참조만 보관 (DataFrame은 공유 캐시)
+                set_session_shopping_file(file_path)
                 st.session_state['shopping_summary'] = summary
                 st.session_state['file_path'] = file_path
                 st.session_state['search_query'] = search_query.strip()
@@ -149,9 +331,9 @@ def shopping_compare():
                 st.error(f"❌ 검색 중 오류가 발생했습니다: {str(e)}")
                 return
     
-    # 데이터 시각화 및 분석
-    if 'shopping_df' in st.session_state and not st.session_state['shopping_df'].empty:
-        df = st.session_state['shopping_df']
+    # 데이터 시각화 및 분석 (df는 다른 세션과 공유하는 읽기 전용 객체)
+    df = get_session_shopping_data()
+    if df is not None and not df.empty:
         
         # 요약 정보 표시
         if 'shopping_summary' in st.session_state:
@@ -202,7 +384,7 @@ def shopping_compare():
             
             if len(price_df) > 0:
                 # 쇼핑몰별 통계 계산
-                mall_stats = price_df.groupby('mallName').agg({
+                mall_stats = price_df.groupby('mallName', observed=True).agg({
                     'lprice': ['mean', 'min', 'max', 'count']
                 }).round(0)
                 
@@ -313,6 +495,13 @@ def shopping_compare():
                         )
                         
                         st.plotly_chart(fig, use_container_width=True)
+
+        # 쇼핑몰 간 동일 상품 가격 비교
+        if 'lprice' in df.columns and 'mallName' in df.columns:
+            render_product_price_spread(df)
+
+        # 데이터 내보내기
+        render_export_section(st.session_state['shopping_source'][1])
     
     else:
         # 데이터가 없을 때 안내 메시지
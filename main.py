@@ -4,6 +4,7 @@ from components.tab_dash import seoul_smoking_rate_2022
 from components.tab_map import smoking_zone_map
 from components.tab_ai_news import news_chatbot
 from components.tab_shopping_compare import shopping_compare
+from components.admin_profiler import start_rerun_profile, finish_rerun_profile, render_profiler_panel
 
 # 페이지 설정
 st.set_page_config(page_title="Tobacco Data Hub", page_icon="🚬", layout = "wide")
@@ -83,25 +84,33 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# 탭 생성 (이모지 추가로 더 직관적으로)
-tabs = st.tabs([
-    "📊 Smoking Data Statistics", 
-    "🗺️ Seoul Smoking Zone",
-    "📰 News Feed Chat",
-    "🛍️ Shopping Price Compare"
-])
-
-with tabs[0]:
-    seoul_smoking_rate_2022()
-
-with tabs[1]:
-    smoking_zone_map()
-
-with tabs[2]:
-    news_chatbot()
-
-with tabs[3]:
-    shopping_compare()
+# 관리자가 프로파일링을 예약한 재실행만 기록 (꺼져 있으면 None)
+profiler = start_rerun_profile()
+try:
+    # 탭 생성 (이모지 추가로 더 직관적으로)
+    tabs = st.tabs([
+        "📊 Smoking Data Statistics", 
+        "🗺️ Seoul Smoking Zone",
+        "📰 News Feed Chat",
+        "🛍️ Shopping Price Compare"
+    ])
+
+    with tabs[0]:
+        seoul_smoking_rate_2022()
+
+    with tabs[1]:
+        smoking_zone_map()
+
+    with tabs[2]:
+        news_chatbot()
+
+    with tabs[3]:
+        shopping_compare()
+finally:
+    finish_rerun_profile(profiler)
+
+# 관리자용 프로파일러 (?admin=<ADMIN_TOKEN> 으로 접속한 경우만 표시)
+render_profiler_panel()
 
 # 푸터
 st.markdown("""
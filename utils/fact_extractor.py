@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+# utils/fact_extractor.py
+# 프로그램 설명: 뉴스 기사에서 담배 가격, 흡연율, 정책 이름, 시행일 같은 수치/사실을 뽑아 SQLite 표로 저장하고,
+#               간단한 사실 질문에는 검색/GPT 없이 이 표에서 바로 답하는 유틸리티 함수들
+#
+#   python -m utils.fact_extractor build                ← data/chroma_db 의 ciga_articles 에서 사실 추출
+#   python -m utils.fact_extractor ask "담배 가격은?"    ← 표에서 바로 답변 확인
+#
+# 사실 종류 (fact_type)
+#   price          ← 담배 한 갑 가격 등 (원)
+#   smoking_rate   ← 흡연율 (%), 자치구/대상(청소년, 남성 등)/연도
+#   policy         ← 법/조례/시행령 이름
+#   effective_date ← 정책 시행일 (YYYYMMDD)
+
+import re
+import sqlite3
+import datetime
+from pathlib import Path
+
+FACT_DB_PATH = "data/facts.sqlite3"
+DEFAULT_COLLECTION = "ciga_articles"
+FACT_ANSWER_LIMIT = 5
+FACT_QUESTION_MAX_CHARS = 40     # 이보다 긴 질문은 분석형 질문으로 보고 RAG 사용
+
+SEOUL_DISTRICTS = [
+    "강남구", "강동구", "강북구", "강서구", "관악구", "광진구", "구로구", "금천구", "노원구",
+    "도봉구", "동대문구", "동작구", "마포구", "서대문구", "서초구", "성동구", "성북구", "송파구",
+    "양천구", "영등포구", "용산구", "은평구", "종로구", "중구", "중랑구",
+]
+REGION_NAMES = SEOUL_DISTRICTS + ["서울", "전국"]
+RATE_SUBJECTS = ["청소년", "남성", "여성", "성인"]
+
+# 사실 질문이 아닌 분석형 질문 표현 (이 표현이 있으면 RAG 사용)
+ANALYSIS_KEYWORDS = ["비교", "추이", "변화", "효과", "영향", "분석", "왜", "이유", "어떻게", "전망", "평가"]
+# 관련 법/조례 이름을 묻는 표현
+POLICY_QUESTION_KEYWORDS = ["무슨 법", "어떤 법", "관련 법", "근거 법", "무슨 조례", "어떤 조례", "관련 조례"]
+
+FACT_LABELS = {
+    "price": "담배 가격",
+    "smoking_rate": "흡연율",
+    "policy": "관련 법·정책",
+    "effective_date": "정책 시행일",
+}
+
+_PRICE_PATTERN = re.compile(r"((?:\d[\d,]*(?:\.\d+)?\s*만\s*)?(?:\d[\d,]*(?:\.\d+)?\s*천\s*)?(?:\d[\d,]*)?)\s*원")
+# 가격은 '한 갑', '갑당' 바로 뒤(PRICE_CONTEXT_CHARS 이내)나 '원/갑', '원(한 갑)' 형태만 인정
+PRICE_CONTEXT_CHARS = 15
+_PACK_AFTER_PATTERN = re.compile(r"\s*(?:/|\(|씩|에)?\s*(?:한\s*)?갑")
+# 갑과 금액 사이에 이런 단어가 있으면 담배 가격이 아님 (과태료, 세금 등)
+_NON_PRICE_KEYWORDS = ("과태료", "벌금", "범칙금", "포상금", "세금", "부담금", "개별소비세", "담배소비세")
+_PERCENT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:%|퍼센트)")
+_YEAR_PATTERN = re.compile(r"(20\d{2})\s*년")
+_DATE_PATTERN = re.compile(r"(20\d{2})\s*년\s*(\d{1,2})\s*월\s*(\d{1,2})\s*일")
+_POLICY_PATTERN = re.compile(r"([가-힣]{2,20}(?:법|조례|시행령))(?:\s*(?:일부\s*)?개정안)?")
+# 이 말로 끝나면 법/조례 이름이 아님 ('금연방법', '흡연불법', '니코틴대체요법' 등)
+_POLICY_STOPWORD_SUFFIXES = ("방법", "불법", "위법", "해법", "편법", "수법", "용법", "문법", "요법", "치료법",
+                             "금연법", "비법", "기법", "대처법", "극복법", "화법")
+
+def split_sentences(text):
+    """기사 본문을 문장 단위로 분리"""
+    if not text:
+        return []
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if s.strip()]
+
+def parse_korean_amount(text):
+    """'4,500', '4천500', '1만2천' 같은 금액 표현을 정수로 변환 (해석할 수 없으면 None)"""
+    text = text.replace(",", "").replace(" ", "")
+    if not text:
+        return None
+    total = 0.0
+    for unit, scale in (("만", 10000), ("천", 1000)):
+        if unit in text:
+            head, text = text.split(unit, 1)
+            total += float(head or 1) * scale
+    if text:
+        total += float(text)
+    return int(round(total)) if total else None
+
+def _is_pack_price(sentence, start, end):
+    """금액(sentence[start:end])이 담배 한 갑 가격을 말하는지 확인"""
+    before = sentence[max(0, start - PRICE_CONTEXT_CHARS):start]
+    if "갑" in before:
+        between = before[before.rindex("갑"):]
+        return not any(word in between for word in _NON_PRICE_KEYWORDS)
+    return bool(_PACK_AFTER_PATTERN.match(sentence, end))
+
+def _is_policy_name(name):
+    """'금연방법' 같은 일반 명사가 아닌 법/조례 이름인지 확인"""
+    return not name.endswith(_POLICY_STOPWORD_SUFFIXES)
+
+def _find_region(sentence):
+    for name in REGION_NAMES:
+        if name in sentence:
+            return name
+    return None
+
+def _find_year(sentence, published_ymd):
+    match = _YEAR_PATTERN.search(sentence)
+    if match:
+        return int(match.group(1))
+    return published_ymd // 10000 if published_ymd else None
+
+def extract_facts(text):
+    """
+    기사 본문에서 사실 후보 추출
+
+    Returns:
+        list: (fact_type, subject, value, unit, value_text, region, sentence) 튜플 목록
+    """
+    facts = []
+    for sentence in split_sentences(text):
+        region = _find_region(sentence)
+
+        # 담배 가격 (한 갑 가격만, 과태료/세금 등은 제외)
+        if "담배" in sentence and "갑" in sentence:
+            for match in _PRICE_PATTERN.finditer(sentence):
+                if not _is_pack_price(sentence, match.start(1), match.end()):
+                    continue
+                amount = parse_korean_amount(match.group(1))
+                if amount and 1000 <= amount <= 100000:
+                    subject = "전자담배" if "전자담배" in sentence else "담배"
+                    facts.append(("price", subject, amount, "원", None, region, sentence))
+
+        # 흡연율
+        if "흡연율" in sentence:
+            after = sentence[sentence.index("흡연율"):]
+            match = _PERCENT_PATTERN.search(after) or _PERCENT_PATTERN.search(sentence)
+            if match and 0 < float(match.group(1)) <= 100:
+                subject = next((s for s in RATE_SUBJECTS if s in sentence), "")
+                facts.append(("smoking_rate", subject, float(match.group(1)), "%", None, region, sentence))
+
+        # 법/조례 이름과 시행일
+        policies = [p for p in _POLICY_PATTERN.findall(sentence) if _is_policy_name(p)]
+        for policy in dict.fromkeys(policies):
+            facts.append(("policy", "", None, None, policy, region, sentence))
+        if "시행" in sentence:
+            match = _DATE_PATTERN.search(sentence)
+            if match:
+                year, month, day = (int(g) for g in match.groups())
+                try:
+                    datetime.date(year, month, day)
+                except ValueError:
+                    continue
+                facts.append(("effective_date", "", year * 10000 + month * 100 + day, "date",
+                              policies[0] if policies else None, region, sentence))
+    return facts
+
+def init_fact_db(db_path=FACT_DB_PATH):
+    """사실 표 생성 (기존 내용은 삭제)"""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        DROP TABLE IF EXISTS facts;
+        DROP TABLE IF EXISTS fact_meta;
+        CREATE TABLE facts (
+            id INTEGER PRIMARY KEY,
+            fact_type TEXT NOT NULL,
+            subject TEXT,
+            value REAL,
+            unit TEXT,
+            value_text TEXT,
+            region TEXT,
+            year INTEGER,
+            published_ymd INTEGER,
+            source TEXT,
+            sentence TEXT,
+            title TEXT,
+            url TEXT,
+            doc_id TEXT
+        );
+        CREATE INDEX idx_facts_type_region_year ON facts (fact_type, region, year);
+        CREATE INDEX idx_facts_type_date ON facts (fact_type, published_ymd);
+        CREATE TABLE fact_meta (key TEXT PRIMARY KEY, value TEXT);
+    """)
+    return conn
+
+def build_fact_table(collection, db_path=FACT_DB_PATH, batch_size=200):
+    """
+    컬렉션 전체 기사에서 사실을 추출해 SQLite 표에 저장
+
+    Returns:
+        int: 저장한 사실 수
+    """
+    from utils.news_filters import parse_date_to_int
+
+    conn = init_fact_db(db_path)
+    count, offset = 0, 0
+    with conn:
+        while True:
+            batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                break
+            rows = []
+            for doc_id, document, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                metadata = metadata or {}
+                published_ymd = parse_date_to_int(metadata.get("published_date"))
+                for fact_type, subject, value, unit, value_text, region, sentence in extract_facts(document):
+                    rows.append((fact_type, subject, value, unit, value_text, region,
+                                 _find_year(sentence, published_ymd), published_ymd, metadata.get("source"),
+                                 sentence[:500], metadata.get("title"), metadata.get("url"), doc_id))
+            conn.executemany(
+                "INSERT INTO facts (fact_type, subject, value, unit, value_text, region, year, published_ymd,"
+                " source, sentence, title, url, doc_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            count += len(rows)
+            offset += len(batch["ids"])
+
+        conn.executemany("INSERT INTO fact_meta (key, value) VALUES (?, ?)", [
+            ("collection", collection.name),
+            ("document_count", str(offset)),
+            ("built_at", datetime.datetime.now().isoformat(timespec='seconds')),
+        ])
+    conn.close()
+    return count
+
+def detect_fact_question(question):
+    """
+    질문이 사실 표로 답할 수 있는 간단한 질문인지 판별
+
+    Returns:
+        dict or None: {"fact_type", "region", "year", "subject", "policy"} (분석형 질문이면 None)
+    """
+    question = question.strip()
+    if len(question) > FACT_QUESTION_MAX_CHARS or any(word in question for word in ANALYSIS_KEYWORDS):
+        return None
+
+    if "흡연율" in question:
+        fact_type = "smoking_rate"
+    elif "시행" in question and any(word in question for word in ("언제", "날짜", "시행일")):
+        fact_type = "effective_date"
+    elif "담배" in question and any(word in question for word in ("가격", "얼마", "값")):
+        fact_type = "price"
+    elif any(word in question for word in POLICY_QUESTION_KEYWORDS):
+        fact_type = "policy"
+    else:
+        return None
+
+    # 질문에 법/조례 이름이 있으면 그 법/조례의 사실만 찾음 ('국민건강증진법 시행일은 언제?')
+    policy = next((p for p in _POLICY_PATTERN.findall(question) if _is_policy_name(p)), None)
+    year = _YEAR_PATTERN.search(question)
+    return {
+        "fact_type": fact_type,
+        "region": _find_region(question),
+        "year": int(year.group(1)) if year else None,
+        "subject": next((s for s in RATE_SUBJECTS + ["전자담배"] if s in question), None),
+        "policy": policy,
+    }
+
+def fact_date_range(intent, date_range):
+    """
+    사실 조회에 적용할 기사 발행일 범위
+
+    질문에 연도가 있으면 그 연도의 사실만 찾고 발행일 범위는 적용하지 않음
+    (2020년 수치를 다룬 2024년 기사처럼 두 조건이 서로 어긋나 답을 놓치지 않도록)
+    """
+    return None if intent and intent["year"] else date_range
+
+def query_facts(intent, db_path=FACT_DB_PATH, date_range=None, sources=None, limit=FACT_ANSWER_LIMIT):
+    """질문 의도에 맞는 사실을 최신 기사 순으로 조회 (같은 값/같은 기사는 한 번만, 연도와 발행일 범위 중 하나만 적용)"""
+    if not Path(db_path).exists():
+        return []
+
+    conditions, params = ["fact_type = ?", "url IS NOT NULL", "url != ''"], [intent["fact_type"]]
+    if intent["region"]:
+        conditions.append("region = ?")
+        params.append(intent["region"])
+    if intent["year"]:
+        conditions.append("year = ?")
+        params.append(intent["year"])
+    if intent["subject"]:
+        conditions.append("subject = ?")
+        params.append(intent["subject"])
+    if intent.get("policy"):
+        # 기사마다 법 이름 앞부분이 다르게 잡힐 수 있어 한쪽이 다른 쪽을 포함하면 같은 법으로 봄
+        conditions.append("value_text IS NOT NULL AND (instr(value_text, ?) > 0 OR instr(?, value_text) > 0)")
+        params.extend([intent["policy"], intent["policy"]])
+    date_range = fact_date_range(intent, date_range)
+    if date_range:
+        conditions.append("published_ymd BETWEEN ? AND ?")
+        params.extend(int(d.strftime("%Y%m%d")) for d in date_range)
+    if sources:
+        conditions.append(f"source IN ({', '.join('?' * len(sources))})")
+        params.extend(sources)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT value, unit, value_text, region, subject, year, published_ymd, sentence, title, url"
+            f" FROM facts WHERE {' AND '.join(conditions)} ORDER BY published_ymd DESC LIMIT ?",
+            params + [limit * 10]
+        ).fetchall()
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+
+    facts, seen = [], set()
+    for row in rows:
+        key = (row[0], row[2], row[9])
+        if key in seen:
+            continue
+        seen.add(key)
+        facts.append(dict(zip(
+            ["value", "unit", "value_text", "region", "subject", "year", "published_ymd", "sentence", "title", "url"],
+            row)))
+        if len(facts) >= limit:
+            break
+    return facts
+
+def _format_value(fact):
+    if fact["unit"] == "원":
+        return f"{int(fact['value']):,}원"
+    if fact["unit"] == "%":
+        return f"{fact['value']:g}%"
+    if fact["unit"] == "date":
+        value = int(fact["value"])
+        label = f"{value // 10000}년 {value // 100 % 100}월 {value % 100}일"
+        return f"{fact['value_text']} {label}" if fact["value_text"] else label
+    return fact["value_text"]
+
+def answer_from_facts(question, db_path=FACT_DB_PATH, date_range=None, sources=None):
+    """
+    사실 표에서 바로 답변 생성
+
+    Returns:
+        str or None: 출처 링크가 포함된 답변 (해당하는 사실이 없거나 분석형 질문이면 None)
+    """
+    intent = detect_fact_question(question)
+    if intent is None:
+        return None
+    facts = query_facts(intent, db_path, date_range, sources)
+    if not facts:
+        return None
+
+    scope = " ".join(str(part) for part in (intent["year"] and f"{intent['year']}년", intent["region"],
+                                               intent["subject"], intent["policy"]) if part)
+    lines = [f"📊 **기사에서 확인된 {scope + ' ' if scope else ''}{FACT_LABELS[intent['fact_type']]}**", ""]
+    for fact in facts:
+        sentence = fact["sentence"] if len(fact["sentence"]) <= 120 else fact["sentence"][:120] + "..."
+        date = ""
+        if fact["published_ymd"]:
+            ymd = int(fact["published_ymd"])
+            date = f", {ymd // 10000}-{ymd // 100 % 100:02d}-{ymd % 100:02d}"
+        lines.append(f"- **{_format_value(fact)}** — {sentence} ([{fact['title'] or '기사'}]({fact['url']}){date})")
+    lines += ["", "_기사에서 추출한 수치입니다. 배경이나 분석이 궁금하시면 질문을 더 구체적으로 입력해주세요._"]
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="뉴스 기사 사실 표 생성/조회")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="컬렉션에서 사실 추출")
+    build_parser.add_argument("--db-path", default="data/chroma_db", help="Chroma 저장 경로")
+    build_parser.add_argument("--collection", default=DEFAULT_COLLECTION, help="대상 컬렉션")
+    ask_parser = subparsers.add_parser("ask", help="사실 표로 질문에 답변")
+    ask_parser.add_argument("question", help="질문")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        import chromadb
+        client = chromadb.PersistentClient(path=args.db_path)
+        count = build_fact_table(client.get_collection(name=args.collection))
+        print(f"[{args.collection}] 사실 {count}건 저장: {FACT_DB_PATH}")
+    else:
+        print(answer_from_facts(args.question) or "사실 표에서 답을 찾지 못했습니다 (RAG 사용).")
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+# utils/file_hash.py
+# 프로그램 설명: 파일 내용 해시 (빌드 원본 확인, 공유 캐시 키 등 여러 모듈에서 공통 사용)
+
+import hashlib
+
+def file_sha256(path):
+    """파일 내용의 SHA-256 해시 (1MB 단위로 읽어 큰 파일도 메모리에 올리지 않음)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
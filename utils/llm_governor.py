@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# utils/llm_governor.py
+# 프로그램 설명: 프로세스 전체의 OpenAI 동시 요청 수와 분당 토큰 사용량을 제한하는 대기열(governor)
+#
+# 모든 세션의 답변 생성 요청은 도착 순서대로(FIFO) 대기열에 들어가고,
+#   - 동시에 처리 중인 요청 수가 max_in_flight 미만이고
+#   - 최근 1분간 사용한(예상) 토큰 수 + 이번 요청 예상 토큰이 tokens_per_minute 이하일 때
+# 맨 앞 요청부터 순서대로 실행됩니다.
+# 대기열이 max_queue 이상으로 길거나 queue_timeout 안에 차례가 오지 않으면 LLMOverloaded 를 발생시켜
+# 호출하는 쪽에서 간단한 응답으로 대체할 수 있게 합니다.
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+TOKEN_WINDOW_SECONDS = 60
+CHARS_PER_TOKEN = 2         # 한국어 기사 기준 대략적인 글자/토큰 비율
+
+class LLMOverloaded(Exception):
+    """대기열이 가득 찼거나 대기 시간이 초과된 경우"""
+
+class LLMRequestCancelled(Exception):
+    """대기 중에 사용자가 요청을 취소한 경우"""
+
+def estimate_tokens(text_chars, max_output_tokens=0):
+    """프롬프트 글자 수와 최대 출력 토큰으로 요청 토큰 수 추정"""
+    return text_chars // CHARS_PER_TOKEN + max_output_tokens
+
+class _Ticket:
+    """대기열 항목 (같은 토큰 수의 요청도 서로 구분되도록 객체 동일성으로 비교)"""
+
+    __slots__ = ("tokens",)
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+class LLMGovernor:
+    """OpenAI 요청 동시 실행 수 / 분당 토큰 제한 대기열"""
+
+    def __init__(self, max_in_flight=4, tokens_per_minute=200_000, max_queue=20, queue_timeout=60):
+        self.max_in_flight = max_in_flight
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._condition = threading.Condition()
+        self._queue = deque()           # 대기 중인 요청 ticket (도착 순서)
+        self._in_flight = 0
+        self._usage = deque()           # (시각, 토큰 수) 최근 사용 기록
+
+    def _tokens_in_window(self, now):
+        while self._usage and now - self._usage[0][0] > TOKEN_WINDOW_SECONDS:
+            self._usage.popleft()
+        return sum(tokens for _, tokens in self._usage)
+
+    def _can_start(self, ticket, now):
+        if self._queue[0] is not ticket or self._in_flight >= self.max_in_flight:
+            return False
+        used = self._tokens_in_window(now)
+        # 한 요청이 분당 한도보다 커도 다른 사용량이 없으면 실행 (영원히 대기하지 않도록)
+        return used == 0 or used + ticket.tokens <= self.tokens_per_minute
+
+    def stats(self):
+        """현재 처리 중/대기 중 요청 수와 최근 1분 토큰 사용량"""
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "tokens_last_minute": self._tokens_in_window(time.time()),
+            }
+
+    @contextmanager
+    def slot(self, estimated_tokens, on_wait=None, is_cancelled=None):
+        """
+        실행 차례를 기다렸다가 요청을 실행하는 컨텍스트 매니저
+
+        Args:
+            estimated_tokens (int): 요청 예상 토큰 수
+            on_wait (callable): 대기 순서가 바뀔 때마다 호출 (1부터 시작하는 대기 순서 전달)
+            is_cancelled (callable): True를 반환하면 대기를 중단
+
+        Raises:
+            LLMOverloaded: 대기열이 가득 찼거나 대기 시간 초과
+            LLMRequestCancelled: 대기 중 취소
+        """
+        ticket = _Ticket(estimated_tokens)
+        deadline = time.time() + self.queue_timeout
+
+        with self._condition:
+            if len(self._queue) >= self.max_queue:
+                raise LLMOverloaded(f"대기 중인 요청이 {len(self._queue)}건입니다")
+            self._queue.append(ticket)
+            last_position = None
+            try:
+                while True:
+                    now = time.time()
+                    if self._can_start(ticket, now):
+                        break
+                    if is_cancelled is not None and is_cancelled():
+                        raise LLMRequestCancelled()
+                    if now >= deadline:
+                        raise LLMOverloaded(f"{self.queue_timeout}초 동안 차례가 오지 않았습니다")
+
+                    position = self._queue.index(ticket) + 1
+                    if on_wait is not None and position != last_position:
+                        on_wait(position)
+                        last_position = position
+                    # 토큰 한도로 기다리는 경우 다른 요청의 완료 알림이 없을 수 있으므로 주기적으로 다시 확인
+                    self._condition.wait(timeout=min(1.0, max(0.0, deadline - now)))
+            except BaseException:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+                raise
+
+            self._queue.popleft()
+            self._in_flight += 1
+            self._usage.append((time.time(), estimated_tokens))
+            self._condition.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+# utils/map_data.py
+# 프로그램 설명: 흡연구역 지도 데이터를 가공하고 자치구별 통계 테이블을 만드는 유틸리티 함수들
+#
+# 원본 CSV(cp949)의 검증/정제는 배포 전에 한 번만 수행하고, 지도 탭은 빌드된 파일을 바로 불러옵니다.
+#   python -m utils.map_data build        ← data/smoking_areas.csv → data/smoking_areas.compiled.npz
+#                                            + static/map_tiles/{z}/{x}/{y}.json (뷰포트 단위 타일)
+
+import datetime
+import json
+import math
+import re
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from utils.file_hash import file_sha256
+
+# 원본/빌드 파일 경로
+RAW_MAP_DATA_PATH = "data/smoking_areas.csv"
+COMPILED_MAP_DATA_PATH = "data/smoking_areas.compiled.npz"
+REJECTED_MAP_DATA_PATH = "data/smoking_areas.rejected.csv"
+
+# 지도 타일 (Streamlit 정적 파일 서빙 경로 static/ 아래에 저장, app/static/... 으로 접근)
+MAP_TILES_DIR = "static/map_tiles"
+MAP_TILES_URL = "app/static/map_tiles/{z}/{x}/{y}.json"
+MAP_TILE_MIN_ZOOM = 9
+MAP_TILE_MAX_ZOOM = 13   # 이보다 확대하면 13레벨 타일을 확대해서 사용
+
+# 빌드 파일 형식 버전 (컬럼 구성이 바뀌면 올려서 이전 빌드 파일을 무효화)
+MAP_ASSET_FORMAT_VERSION = 1
+
+# 서울시 좌표 범위 (위도 최소, 위도 최대, 경도 최소, 경도 최대)
+SEOUL_BBOX = (37.41, 37.72, 126.76, 127.19)
+
+# 원본 컬럼명 → 지도 탭 컬럼명
+RAW_COLUMN_MAP = {'자치구명': '자치구', '시설구분': '장소', '위도': 'latitude', '경도': 'longitude'}
+MAP_TEXT_COLUMNS = ['자치구', '장소', '주소', '시설유형']
+
+# 전체 자치구 합계 행 이름 (지도 탭의 '전체 보기' 선택지와 동일)
+TOTAL_LABEL = "전체 보기"
+
+# 시설명 패턴 기반 시설 유형 분류 규칙 (위에서부터 먼저 일치하는 유형 적용)
+FACILITY_TYPE_RULES = [
+    ("당구장", r"당구|캐롬"),
+    ("PC방·게임", r"PC|피씨|게임|플스|만화"),
+    ("체육시설", r"골프|휘트니스|피트니스|체육|수영장|레포츠|헬스|볼링"),
+    ("음식점·카페", r"음식점|커피|카페|CAFE|호프|갈비|펍|식당|포차|이디야|탐앤탐스|스타벅스"),
+    ("공공기관", r"구청|의회|보건소|경찰|소방서|주민센터|청사|공단|도서관|사업소|사업본부|세무서|우체국"),
+    ("의료기관", r"병원|의원|한방|의료"),
+    ("대학교", r"대학|학교|폴리텍"),
+    ("교통시설", r"터미널|공항|역(?:\s|\d|$)|정류장|차고지"),
+    ("상업시설", r"백화점|마트|몰|시장|쇼핑|아울렛|플라자|프라자"),
+    ("숙박·사우나", r"호텔|스테이|사우나|목욕|레지던스"),
+]
+OTHER_FACILITY_TYPE = "기타"
+FACILITY_TYPES = [name for name, _ in FACILITY_TYPE_RULES] + [OTHER_FACILITY_TYPE]
+_FACILITY_TYPE_PATTERNS = [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern in FACILITY_TYPE_RULES]
+
+# 지도 크기 (자동 확대 배율 계산용, 지도 탭의 pydeck_chart 크기와 맞춤)
+MAP_WIDTH_PX = 1000
+MAP_HEIGHT_PX = 750
+
+def classify_facility(name):
+    """
+    시설명을 시설 유형으로 분류하는 함수
+
+    Args:
+        name (str): 시설구분 값 (예: '관악구청 9층 옥상')
+
+    Returns:
+        str: FACILITY_TYPES 중 하나
+    """
+    if not isinstance(name, str):
+        return OTHER_FACILITY_TYPE
+    for facility_type, pattern in _FACILITY_TYPE_PATTERNS:
+        if pattern.search(name):
+            return facility_type
+    return OTHER_FACILITY_TYPE
+
+def build_district_stats(data, total_label=TOTAL_LABEL):
+    """
+    자치구별 흡연구역 수, 중심 좌표, 범위(bounding box), 시설 유형별 개수를 계산하는 함수
+
+    Args:
+        data (pd.DataFrame): 자치구, 시설유형, latitude, longitude 컬럼을 가진 흡연구역 데이터
+        total_label (str): 서울시 전체 합계 행 이름
+
+    Returns:
+        pd.DataFrame: 자치구를 인덱스로 하는 통계 테이블 (마지막 행은 전체 합계)
+    """
+    valid = data.dropna(subset=['latitude', 'longitude'])
+
+    def summarize(group):
+        return {
+            "흡연구역수": len(group),
+            "중심_위도": group['latitude'].mean(),
+            "중심_경도": group['longitude'].mean(),
+            "최소_위도": group['latitude'].min(),
+            "최대_위도": group['latitude'].max(),
+            "최소_경도": group['longitude'].min(),
+            "최대_경도": group['longitude'].max(),
+        }
+
+    stats = pd.DataFrame.from_dict(
+        {district: summarize(group) for district, group in valid.groupby('자치구')},
+        orient='index'
+    )
+    type_counts = (
+        pd.crosstab(valid['자치구'], valid['시설유형'])
+        .reindex(columns=FACILITY_TYPES, fill_value=0)
+    )
+    stats = stats.join(type_counts).sort_values("흡연구역수", ascending=False)
+
+    # 전체 합계 행 추가
+    total = pd.DataFrame.from_dict({total_label: summarize(valid)}, orient='index')
+    total = total.join(pd.DataFrame([type_counts.sum()], index=[total_label]))
+    stats = pd.concat([stats, total])
+    count_columns = ["흡연구역수"] + FACILITY_TYPES
+    stats[count_columns] = stats[count_columns].astype(int)
+    stats.index.name = '자치구'
+    return stats
+
+def zoom_for_bbox(min_lat, max_lat, min_lon, max_lon,
+                  width=MAP_WIDTH_PX, height=MAP_HEIGHT_PX, padding=0.4, min_zoom=9, max_zoom=16):
+    """
+    범위(bounding box)가 지도 안에 모두 들어오는 확대 배율을 계산하는 함수 (Web Mercator, 512px 타일 기준)
+
+    Returns:
+        float: pydeck ViewState에 사용할 zoom 값
+    """
+    lon_span = max(max_lon - min_lon, 1e-6)
+    zoom_lon = math.log2(360 * width / (512 * lon_span))
+
+    def mercator_y(lat):
+        return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+    lat_fraction = max(mercator_y(max_lat) - mercator_y(min_lat), 1e-9) / (2 * math.pi)
+    zoom_lat = math.log2(height / (512 * lat_fraction))
+
+    return max(min_zoom, min(max_zoom, min(zoom_lon, zoom_lat) - padding))
+
+def _parse_coordinate(values):
+    """좌표 문자열을 숫자로 변환 (끝에 붙은 '?' 같은 잡음 문자는 제거하고 보정 여부 기록)"""
+    stripped = values.fillna('').astype(str).str.strip()
+    cleaned = stripped.str.replace(r'[^0-9.\-]+$', '', regex=True)
+    numbers = pd.to_numeric(cleaned, errors='coerce')
+    repaired = numbers.notna() & (cleaned != stripped)
+    return numbers, repaired
+
+def compile_smoking_areas(raw_path=RAW_MAP_DATA_PATH, encoding='cp949', bbox=SEOUL_BBOX):
+    """
+    원본 흡연구역 CSV를 검증/정제하는 함수
+
+    - 좌표 끝의 잡음 문자 제거, 위도/경도가 뒤바뀐 행 교정
+    - 좌표가 없거나 bbox 밖인 행, 자치구가 없는 행 제외
+    - 주소와 시설명이 모두 같은 중복 행 제거 (같은 건물의 다른 흡연구역은 유지)
+    - 시설 유형 분류
+
+    Args:
+        raw_path (str): 원본 CSV 경로
+        encoding (str): 원본 인코딩
+        bbox (tuple): 허용 좌표 범위 (위도 최소, 위도 최대, 경도 최소, 경도 최대)
+
+    Returns:
+        tuple: (정제된 DataFrame, 제외된 행 DataFrame(사유 포함), 요약 정보 dict)
+    """
+    raw = pd.read_csv(raw_path, encoding=encoding, dtype=str)
+    raw = raw.rename(columns=RAW_COLUMN_MAP)
+    for col in ['자치구', '장소', '주소']:
+        raw[col] = raw[col].fillna('').str.strip()
+
+    latitude, lat_repaired = _parse_coordinate(raw['latitude'])
+    longitude, lon_repaired = _parse_coordinate(raw['longitude'])
+
+    # 위도/경도가 뒤바뀐 행 교정
+    min_lat, max_lat, min_lon, max_lon = bbox
+    swapped = (latitude.between(min_lon, max_lon) & longitude.between(min_lat, max_lat))
+    latitude, longitude = latitude.where(~swapped, longitude), longitude.where(~swapped, latitude)
+
+    data = raw.assign(latitude=latitude, longitude=longitude)
+
+    # 제외 사유 판정 (먼저 해당하는 사유 하나만 기록)
+    reason = pd.Series('', index=data.index)
+    reason[data['자치구'] == ''] = '자치구 없음'
+    reason[(reason == '') & (data['latitude'].isna() | data['longitude'].isna())] = '좌표 없음'
+    in_bbox = data['latitude'].between(min_lat, max_lat) & data['longitude'].between(min_lon, max_lon)
+    reason[(reason == '') & ~in_bbox] = '좌표 범위 밖'
+
+    rejected = raw[reason != ''].assign(제외사유=reason[reason != ''])
+    valid = data[reason == '']
+
+    # 중복 제거
+    duplicated = valid.duplicated(subset=['주소', '장소'], keep='first')
+    valid = valid[~duplicated].copy()
+    valid['시설유형'] = valid['장소'].map(classify_facility)
+    valid = valid[MAP_TEXT_COLUMNS[:3] + ['latitude', 'longitude', '시설유형']].reset_index(drop=True)
+
+    report = {
+        "원본_행수": len(raw),
+        "유효_행수": len(valid),
+        "좌표_보정": int((lat_repaired | lon_repaired).sum()),
+        "위경도_교정": int(swapped.sum()),
+        "제외_행수": len(rejected),
+        "중복_제거": int(duplicated.sum()),
+        "제외_사유": rejected['제외사유'].value_counts().to_dict(),
+    }
+    return valid, rejected, report
+
+def save_map_asset(data, path=COMPILED_MAP_DATA_PATH, source_path=RAW_MAP_DATA_PATH, report=None):
+    """
+    정제된 데이터를 버전 정보와 함께 압축 NumPy 파일(.npz)로 저장하는 함수
+
+    pickle을 쓰지 않으므로 pandas 버전이 달라도 그대로 불러올 수 있습니다.
+
+    Returns:
+        dict: 저장된 버전 정보
+    """
+    stamp = {
+        "format_version": MAP_ASSET_FORMAT_VERSION,
+        "built_at": datetime.datetime.now().isoformat(timespec='seconds'),
+        "source_sha256": file_sha256(source_path),
+        "rows": len(data),
+        "report": report or {},
+    }
+    arrays = {col: data[col].to_numpy(dtype=str) for col in MAP_TEXT_COLUMNS}
+    arrays['latitude'] = data['latitude'].to_numpy(dtype=np.float64)
+    arrays['longitude'] = data['longitude'].to_numpy(dtype=np.float64)
+    arrays['stamp'] = np.array(json.dumps(stamp, ensure_ascii=False))
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    return stamp
+
+def load_map_asset(path=COMPILED_MAP_DATA_PATH):
+    """
+    빌드된 지도 데이터를 불러오는 함수
+
+    Returns:
+        tuple: (DataFrame, 버전 정보 dict)
+
+    Raises:
+        ValueError: 빌드 파일 형식 버전이 현재 코드와 다를 때
+    """
+    with np.load(path, allow_pickle=False) as asset:
+        stamp = json.loads(str(asset['stamp']))
+        if stamp.get("format_version") != MAP_ASSET_FORMAT_VERSION:
+            raise ValueError(f"지도 데이터 형식 버전 불일치: {stamp.get('format_version')} (필요: {MAP_ASSET_FORMAT_VERSION})")
+        data = pd.DataFrame({col: asset[col] for col in MAP_TEXT_COLUMNS[:3] + ['latitude', 'longitude', '시설유형']})
+    data['자치구'] = data['자치구'].astype('category')
+    data['시설유형'] = data['시설유형'].astype('category')
+    return data, stamp
+
+def lonlat_to_tile(longitude, latitude, zoom):
+    """경도/위도 배열을 Web Mercator 타일 번호(x, y) 배열로 변환"""
+    n = 2 ** zoom
+    lat_rad = np.radians(np.asarray(latitude, dtype=np.float64))
+    x = np.floor((np.asarray(longitude, dtype=np.float64) + 180.0) / 360.0 * n).astype(int)
+    y = np.floor((1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n).astype(int)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+def build_map_tiles(data, stamp, out_dir=MAP_TILES_DIR, bbox=SEOUL_BBOX,
+                    min_zoom=MAP_TILE_MIN_ZOOM, max_zoom=MAP_TILE_MAX_ZOOM):
+    """
+    흡연구역 좌표를 zoom/x/y 타일별 GeoJSON 파일로 나누어 저장하는 함수
+
+    bbox 안의 모든 타일을 (비어 있어도) 만들어 두므로 지도는 화면에 보이는 타일만 요청하고
+    404 없이 불러올 수 있습니다.
+
+    Returns:
+        dict: 타일 목록 정보 (manifest.json 에도 저장)
+    """
+    min_lat, max_lat, min_lon, max_lon = bbox
+    out_path = Path(out_dir)
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [round(lon, 6), round(lat, 6)]},
+            # gu는 지도에서 선택 자치구 강조 표현식에 사용
+            "properties": {"gu": gu, "장소": place, "주소": address},
+        }
+        for gu, place, address, lat, lon in zip(
+            data['자치구'].astype(str), data['장소'], data['주소'], data['latitude'], data['longitude'])
+    ]
+
+    tile_count = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        xs, ys = lonlat_to_tile(data['longitude'], data['latitude'], zoom)
+        buckets = {}
+        for feature, x, y in zip(features, xs, ys):
+            buckets.setdefault((x, y), []).append(feature)
+
+        (x_min, x_max), (y_max, y_min) = (
+            lonlat_to_tile([min_lon, max_lon], [min_lat, max_lat], zoom)
+        )
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                tile_path = out_path / str(zoom) / str(x) / f"{y}.json"
+                tile_path.parent.mkdir(parents=True, exist_ok=True)
+                tile = {"type": "FeatureCollection", "features": buckets.get((x, y), [])}
+                tile_path.write_text(json.dumps(tile, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+                tile_count += 1
+
+    manifest = {
+        "source_sha256": stamp["source_sha256"],
+        "built_at": stamp["built_at"],
+        "min_zoom": min_zoom,
+        "max_zoom": max_zoom,
+        "extent": [min_lon, min_lat, max_lon, max_lat],
+        "tiles": tile_count,
+        "points": len(features),
+    }
+    (out_path / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    return manifest
+
+def load_tile_manifest(out_dir=MAP_TILES_DIR):
+    """타일 목록 정보 로드 (타일이 없으면 None)"""
+    manifest_path = Path(out_dir) / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    return json.loads(manifest_path.read_text(encoding='utf-8'))
+
+def build_map_asset(raw_path=RAW_MAP_DATA_PATH, output_path=COMPILED_MAP_DATA_PATH,
+                    rejected_path=REJECTED_MAP_DATA_PATH, encoding='cp949', bbox=SEOUL_BBOX,
+                    tiles_dir=MAP_TILES_DIR):
+    """원본 CSV 검증 → 제외 행 보고서 저장 → 빌드 파일 저장 → 타일 생성까지 수행하는 통합 함수"""
+    data, rejected, report = compile_smoking_areas(raw_path, encoding=encoding, bbox=bbox)
+    if rejected_path:
+        rejected.to_csv(rejected_path, encoding='utf-8-sig', index=False)
+    stamp = save_map_asset(data, output_path, source_path=raw_path, report=report)
+    if tiles_dir:
+        stamp["tiles"] = build_map_tiles(data, stamp, tiles_dir, bbox=bbox)
+    return data, rejected, stamp
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="흡연구역 지도 데이터 검증 및 빌드")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="원본 CSV를 검증하여 빌드 파일 생성")
+    build_parser.add_argument("--source", default=RAW_MAP_DATA_PATH, help="원본 CSV 경로")
+    build_parser.add_argument("--encoding", default="cp949", help="원본 CSV 인코딩")
+    build_parser.add_argument("--output", default=COMPILED_MAP_DATA_PATH, help="빌드 파일 경로 (.npz)")
+    build_parser.add_argument("--rejected", default=REJECTED_MAP_DATA_PATH, help="제외된 행 보고서 경로")
+    build_parser.add_argument("--bbox", type=float, nargs=4, default=SEOUL_BBOX,
+                              metavar=("MIN_LAT", "MAX_LAT", "MIN_LON", "MAX_LON"), help="허용 좌표 범위")
+    build_parser.add_argument("--tiles-dir", default=MAP_TILES_DIR, help="지도 타일 저장 경로")
+    build_parser.add_argument("--no-tiles", action="store_true", help="지도 타일 생성 생략")
+    args = parser.parse_args()
+
+    data, rejected, stamp = build_map_asset(args.source, args.output, args.rejected, args.encoding,
+                                            tuple(args.bbox), None if args.no_tiles else args.tiles_dir)
+    print(f"빌드 완료: {args.output} ({stamp['rows']}행, {stamp['built_at']})")
+    if "tiles" in stamp:
+        print(f"지도 타일: {args.tiles_dir} ({stamp['tiles']['tiles']}개, "
+              f"zoom {stamp['tiles']['min_zoom']}~{stamp['tiles']['max_zoom']})")
+    for key, value in stamp["report"].items():
+        print(f"  {key}: {value}")
+    if len(rejected):
+        print(f"제외된 행 {len(rejected)}건 → {args.rejected}")
+        print(rejected.to_string(max_rows=20))
@@ -9,15 +9,31 @@ import urllib.request
 import urllib.parse
 import datetime
 from pathlib import Path
+from utils.product_matching import match_products
+from utils.singleflight import SingleFlight, SingleFlightTimeout
+from utils.shared_cache import get_shared_cache, make_key
 
 # 네이버 API 클라이언트 정보
 CLIENT_ID = "qUdRFUYQv27dI6GZr4Wz"
 CLIENT_SECRET = "HWYWOFBEYH"
 
+# 같은 검색이 동시에 들어오면 API는 한 번만 호출 (프로세스 전체)
+_shopping_flight = SingleFlight()
+
+# 검색 응답을 다른 프로세스와 공유하는 시간 (초)
+NAVER_RESPONSE_TTL = 600
+
+# API 호출 제한 시간, 같은 검색의 결과를 기다리는 최대 시간 (초)
+NAVER_REQUEST_TIMEOUT = 10
+NAVER_WAIT_TIMEOUT = NAVER_REQUEST_TIMEOUT * 2
+
 def get_naver_shopping_data(search_query, display=100, sort='date'):
     """
     네이버 쇼핑 API를 사용하여 상품 목록을 가져오는 함수
     
+    같은 조건의 검색이 이미 진행 중이면 새로 호출하지 않고 그 결과를 함께 받습니다.
+    최근(NAVER_RESPONSE_TTL 이내) 다른 프로세스가 받은 응답이 공유 캐시에 있으면 그대로 사용합니다.
+    
     Args:
         search_query (str): 검색할 상품명
         display (int): 가져올 상품 개수 (최대 100개)
@@ -26,6 +42,27 @@ def get_naver_shopping_data(search_query, display=100, sort='date'):
     Returns:
         str: JSON 형태의 응답 데이터
     """
+    # 앞뒤 공백만 다른 검색어는 같은 검색 (키와 실제 요청 모두 정리한 검색어 사용)
+    search_query = search_query.strip()
+    display = int(display)
+    try:
+        result, _ = _shopping_flight.do((search_query, display, sort), _cached_naver_shopping_data,
+                                        (search_query, display, sort), timeout=NAVER_WAIT_TIMEOUT)
+    except SingleFlightTimeout:
+        raise Exception(f"네이버 쇼핑 API 응답이 {NAVER_WAIT_TIMEOUT}초 안에 오지 않았습니다. 잠시 후 다시 시도해주세요.")
+    return result
+
+def _cached_naver_shopping_data(search_query, display, sort):
+    """공유 캐시에 없을 때만 API 호출 (search_query 는 정리된 검색어)"""
+    return get_shared_cache().get_or_set(
+        "naver_shop",
+        make_key(search_query, display, sort),
+        lambda: _request_naver_shopping_data(search_query, display, sort),
+        ttl=NAVER_RESPONSE_TTL
+    )
+
+def _request_naver_shopping_data(search_query, display, sort):
+    """네이버 쇼핑 API 실제 호출"""
     try:
         # 검색어 URL 인코딩
         enc_text = urllib.parse.quote(search_query)
@@ -39,7 +76,7 @@ def get_naver_shopping_data(search_query, display=100, sort='date'):
         request.add_header("X-Naver-Client-Secret", CLIENT_SECRET)
         
         # API 호출
-        response = urllib.request.urlopen(request)
+        response = urllib.request.urlopen(request, timeout=NAVER_REQUEST_TIMEOUT)
         rescode = response.getcode()
         
         if rescode == 200:
@@ -129,6 +166,63 @@ def clean_and_process_shopping_data(df):
     except Exception as e:
         raise Exception(f"데이터 정제 중 오류 발생: {str(e)}")
 
+# 반복되는 값이 많아 category로 저장할 컬럼 (쇼핑몰/브랜드/카테고리 등)
+CATEGORY_COLUMNS = ['mallName', '쇼핑몰', 'brand', 'maker', 'productType',
+                    'category1', 'category2', 'category3', 'category4', '가격_포맷', '매칭방식']
+
+def optimize_shopping_dtypes(df):
+    """
+    쇼핑 데이터의 메모리 사용량을 줄이도록 컬럼 타입을 변환하는 함수
+    
+    - 쇼핑몰/브랜드/카테고리 컬럼 → category
+    - lprice → int32 (가격 없음은 0), hprice → Int32 (비어 있는 값이 많아 nullable)
+    - 상품그룹 → int32
+    
+    Args:
+        df (pd.DataFrame): 정제된 쇼핑 데이터
+    
+    Returns:
+        pd.DataFrame: 타입이 변환된 DataFrame
+    """
+    if df.empty:
+        return df
+    
+    df_optimized = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in df_optimized.columns:
+            df_optimized[col] = df_optimized[col].astype('category')
+    
+    if 'lprice' in df_optimized.columns:
+        df_optimized['lprice'] = pd.to_numeric(df_optimized['lprice'], errors='coerce').fillna(0).astype('int32')
+    if 'hprice' in df_optimized.columns:
+        df_optimized['hprice'] = pd.to_numeric(df_optimized['hprice'], errors='coerce').round().astype('Int32')
+    if '상품그룹' in df_optimized.columns:
+        df_optimized['상품그룹'] = df_optimized['상품그룹'].astype('int32')
+    
+    return df_optimized
+
+def load_shopping_csv(file_path):
+    """
+    저장된 쇼핑 데이터 CSV를 불러와 동일 상품 매칭과 타입 변환까지 적용하는 함수
+    
+    Args:
+        file_path (str): save_to_csv로 저장한 파일 경로
+    
+    Returns:
+        pd.DataFrame: 메모리 최적화된 쇼핑 데이터
+    """
+    try:
+        df = pd.read_csv(file_path, index_col=0)
+        
+        # 상품그룹 정보가 없는 이전 파일은 불러올 때 한 번만 매칭
+        if '상품그룹' not in df.columns:
+            df = match_products(df)
+        
+        return optimize_shopping_dtypes(df)
+        
+    except Exception as e:
+        raise Exception(f"CSV 파일 로드 중 오류 발생: {str(e)}")
+
 def save_to_csv(df, search_query, save_dir="data"):
     """
     DataFrame을 CSV 파일로 저장하는 함수
@@ -217,6 +311,30 @@ def get_shopping_data_summary(df):
             "오류": str(e)
         }
 
+def fetch_shopping_data(search_query, display=100, sort='date'):
+    """
+    API 호출부터 정제, 동일 상품 매칭까지 수행하는 함수 (파일 저장 없음)
+    
+    Args:
+        search_query (str): 검색할 상품명
+        display (int): 가져올 상품 개수
+        sort (str): 정렬 방식
+    
+    Returns:
+        pd.DataFrame: 정제된 쇼핑 데이터
+    """
+    # 1. API 호출
+    json_result = get_naver_shopping_data(search_query, display, sort)
+    
+    # 2. DataFrame 변환
+    df_raw = convert_json_to_dataframe(json_result)
+    
+    # 3. 데이터 정제
+    df_processed = clean_and_process_shopping_data(df_raw)
+    
+    # 3-1. 쇼핑몰 간 동일 상품 매칭
+    return match_products(df_processed)
+
 def search_and_save_shopping_data(search_query, display=100, sort='date', save_dir="data"):
     """
     검색부터 저장까지 전체 프로세스를 수행하는 통합 함수
@@ -231,14 +349,8 @@ def search_and_save_shopping_data(search_query, display=100, sort='date', save_d
         tuple: (DataFrame, 파일경로, 요약정보)
     """
     try:
-        # 1. API 호출
-        json_result = get_naver_shopping_data(search_query, display, sort)
-        
-        # 2. DataFrame 변환
-        df_raw = convert_json_to_dataframe(json_result)
-        
-        # 3. 데이터 정제
-        df_processed = clean_and_process_shopping_data(df_raw)
+        # 1~3. API 호출, DataFrame 변환, 데이터 정제
+        df_processed = fetch_shopping_data(search_query, display, sort)
         
         # 4. CSV 저장
         file_path = save_to_csv(df_processed, search_query, save_dir)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# utils/news_filters.py
+# 프로그램 설명: 뉴스 챗봇 질문에서 기간/언론사 조건을 찾아 Chroma where 필터로 변환하는 유틸리티 함수들
+#
+# 날짜 범위 비교($gte, $lte)는 Chroma에서 숫자 메타데이터에만 동작하므로,
+# 문자열 published_date를 YYYYMMDD 정수(published_ymd)로 변환해 메타데이터에 추가해 두어야 합니다.
+#   python -m utils.news_filters            ← data/chroma_db 의 모든 컬렉션에 published_ymd 추가
+
+import re
+import datetime
+
+# 날짜 인덱스용 메타데이터 키
+DATE_INDEX_KEY = "published_ymd"
+
+# '최근' 처럼 기간이 명시되지 않은 최신성 질문에 적용할 기본 기간 (일)
+DEFAULT_RECENT_DAYS = 180
+
+# 최신성 질문 키워드
+RECENT_KEYWORDS = ["가장 최근", "최근", "최신", "요즘", "근래", "요새"]
+
+# '최근 N일/주/개월/년' 단위별 일수
+PERIOD_UNIT_DAYS = {"일": 1, "주": 7, "주일": 7, "개월": 30, "달": 30, "년": 365}
+
+def parse_date_to_int(value):
+    """
+    다양한 형식의 날짜 문자열을 YYYYMMDD 정수로 변환하는 함수
+
+    Args:
+        value (str or int): '2025-05-12', '2025.05.12 10:30', '2025년 5월 12일' 등의 날짜
+
+    Returns:
+        int or None: YYYYMMDD 정수 (해석할 수 없으면 None)
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value if 19000101 <= value <= 29991231 else None
+
+    match = re.search(r"(\d{4})\s*[-./년]\s*(\d{1,2})\s*[-./월]\s*(\d{1,2})", str(value))
+    if not match:
+        match = re.search(r"(\d{4})(\d{2})(\d{2})", str(value))
+    if not match:
+        return None
+
+    year, month, day = (int(g) for g in match.groups())
+    try:
+        datetime.date(year, month, day)
+    except ValueError:
+        return None
+    return year * 10000 + month * 100 + day
+
+def int_to_date(value):
+    """YYYYMMDD 정수를 datetime.date로 변환"""
+    return datetime.date(value // 10000, value // 100 % 100, value % 100)
+
+def date_to_int(value):
+    """datetime.date를 YYYYMMDD 정수로 변환"""
+    return value.year * 10000 + value.month * 100 + value.day
+
+def detect_date_range(question, reference_date):
+    """
+    질문에 포함된 기간 표현을 날짜 범위로 변환하는 함수
+
+    '올해', '작년', '최근 3개월' 같은 상대 표현은 reference_date 기준으로 계산합니다.
+    (수집된 기사보다 앞선 현재 날짜를 기준으로 하면 결과가 비는 경우가 많아
+    보통 컬렉션의 가장 최근 기사 날짜를 기준으로 넘깁니다)
+
+    Args:
+        question (str): 사용자 질문
+        reference_date (datetime.date): 상대 기간 계산 기준일
+
+    Returns:
+        tuple or None: (시작일, 종료일) datetime.date 쌍 (기간 표현이 없으면 None)
+    """
+    # 명시적인 연도 ('2024년', '2023~2024년', '2023-2024년', '2023년~2024년')
+    years = [int(y) for match in re.findall(r"(20\d{2})\s*(?:[~\-]\s*(20\d{2})\s*)?년", question)
+             for y in match if y]
+    if years:
+        return datetime.date(min(years), 1, 1), datetime.date(max(years), 12, 31)
+
+    # 상대 연도
+    if "재작년" in question:
+        year = reference_date.year - 2
+        return datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+    if "작년" in question or "지난해" in question:
+        year = reference_date.year - 1
+        return datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+    if "올해" in question or "금년" in question:
+        return datetime.date(reference_date.year, 1, 1), reference_date
+
+    # '최근 N개월' 형태
+    match = re.search(r"(?:최근|지난)\s*(\d+)\s*(주일|개월|일|주|달|년)", question)
+    if match:
+        days = int(match.group(1)) * PERIOD_UNIT_DAYS[match.group(2)]
+        return reference_date - datetime.timedelta(days=days), reference_date
+
+    # 기간 없이 최신성만 묻는 경우
+    if any(keyword in question for keyword in RECENT_KEYWORDS):
+        return reference_date - datetime.timedelta(days=DEFAULT_RECENT_DAYS), reference_date
+
+    return None
+
+def detect_sources(question, available_sources):
+    """질문에 언급된 언론사 이름을 available_sources 중에서 찾아 반환"""
+    return [source for source in available_sources if source and source in question]
+
+def build_where_clause(date_range=None, sources=None):
+    """
+    기간/언론사 조건을 Chroma where 필터로 변환하는 함수
+
+    Args:
+        date_range (tuple): (시작일, 종료일) datetime.date 쌍
+        sources (list): 언론사 이름 목록
+
+    Returns:
+        dict or None: Chroma where 필터 (조건이 없으면 None)
+    """
+    clauses = []
+    if date_range:
+        start, end = date_range
+        clauses.append({DATE_INDEX_KEY: {"$gte": date_to_int(start)}})
+        clauses.append({DATE_INDEX_KEY: {"$lte": date_to_int(end)}})
+    if sources:
+        if len(sources) == 1:
+            clauses.append({"source": sources[0]})
+        else:
+            clauses.append({"source": {"$in": list(sources)}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+def describe_filters(date_range=None, sources=None):
+    """적용된 필터를 사용자에게 보여줄 문장으로 변환"""
+    parts = []
+    if date_range:
+        parts.append(f"{date_range[0]:%Y-%m-%d} ~ {date_range[1]:%Y-%m-%d}")
+    if sources:
+        parts.append(", ".join(sources))
+    return " / ".join(parts)
+
+def backfill_date_index(collection, batch_size=500):
+    """
+    컬렉션의 모든 문서 메타데이터에 published_ymd 정수 필드를 추가하는 함수
+
+    Args:
+        collection: Chroma 컬렉션
+        batch_size (int): 한 번에 갱신할 문서 수
+
+    Returns:
+        tuple: (갱신한 문서 수, 날짜를 해석하지 못한 문서 수)
+    """
+    updated, failed = 0, 0
+    offset = 0
+    while True:
+        batch = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+        ids = batch["ids"]
+        if not ids:
+            break
+
+        update_ids, update_metadatas = [], []
+        for doc_id, metadata in zip(ids, batch["metadatas"]):
+            metadata = dict(metadata or {})
+            ymd = parse_date_to_int(metadata.get("published_date"))
+            if ymd is None:
+                failed += 1
+                continue
+            if metadata.get(DATE_INDEX_KEY) != ymd:
+                metadata[DATE_INDEX_KEY] = ymd
+                update_ids.append(doc_id)
+                update_metadatas.append(metadata)
+
+        if update_ids:
+            collection.update(ids=update_ids, metadatas=update_metadatas)
+            updated += len(update_ids)
+        offset += len(ids)
+
+    return updated, failed
+
+if __name__ == "__main__":
+    import argparse
+    import chromadb
+
+    parser = argparse.ArgumentParser(description="Chroma 컬렉션에 published_ymd 날짜 인덱스 추가")
+    parser.add_argument("db_path", nargs="?", default="data/chroma_db", help="Chroma 저장 경로")
+    parser.add_argument("--collection", help="대상 컬렉션 (생략 시 전체)")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=args.db_path)
+    names = [args.collection] if args.collection else [col.name for col in client.list_collections()]
+    for name in names:
+        updated, failed = backfill_date_index(client.get_collection(name=name))
+        print(f"[{name}] 날짜 인덱스 추가: {updated}건, 날짜 해석 실패: {failed}건")
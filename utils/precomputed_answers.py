@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# utils/precomputed_answers.py
+# 프로그램 설명: 예시 질문/추천 질문의 답변을 미리 만들어 두고 컬렉션 버전별로 보관하는 저장소
+#
+# 답변은 data/precomputed_answers.json 에 저장되므로 앱을 다시 시작해도 바로 사용할 수 있고,
+# 컬렉션 문서가 추가/수정되어 버전이 바뀌면 이전 답변은 사용하지 않습니다.
+# 추천 질문은 data/featured_questions.json 에 문자열 목록으로 추가합니다.
+
+import os
+import json
+import hashlib
+import threading
+import datetime
+from pathlib import Path
+
+PRECOMPUTED_ANSWERS_PATH = "data/precomputed_answers.json"
+FEATURED_QUESTIONS_PATH = "data/featured_questions.json"
+CHROMA_DB_FILE = "data/chroma_db/chroma.sqlite3"
+MAX_STORED_ANSWERS = 200
+
+def normalize_question(question):
+    """공백 차이를 무시하고 같은 질문으로 보기 위한 정규화"""
+    return " ".join(question.split())
+
+def load_featured_questions(path=FEATURED_QUESTIONS_PATH):
+    """추천 질문 목록 로드 (파일이 없거나 형식이 잘못되면 빈 목록)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            questions = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [q for q in questions if isinstance(q, str) and q.strip()]
+
+def collection_version(collections, db_file=CHROMA_DB_FILE):
+    """
+    컬렉션 구성과 내용이 바뀌었는지 판단하는 버전 문자열
+
+    컬렉션 이름/문서 수와 Chroma DB 파일 수정 시각을 조합합니다.
+    (문서 수가 같아도 수정이 있으면 DB 파일이 갱신되므로 버전이 바뀝니다)
+    """
+    parts = sorted(f"{collection.name}:{collection.count()}" for collection in collections)
+    try:
+        parts.append(str(os.path.getmtime(db_file)))
+    except OSError:
+        pass
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:16]
+
+def answer_key(question, collection_names, date_range=None, sources=None):
+    """질문 + 검색 조건으로 만든 저장 키 (같은 질문이라도 검색 범위가 다르면 다른 답변)"""
+    return json.dumps({
+        "question": normalize_question(question),
+        "collections": sorted(collection_names),
+        "date_range": [d.isoformat() for d in date_range] if date_range else None,
+        "sources": sorted(sources) if sources else [],
+    }, ensure_ascii=False, sort_keys=True)
+
+class PrecomputedAnswerStore:
+    """미리 만든 답변 저장소 (프로세스 내 스레드 간 공유, 파일에 영속화)"""
+
+    def __init__(self, path=PRECOMPUTED_ANSWERS_PATH, max_entries=MAX_STORED_ANSWERS):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        # 임시 파일에 쓴 뒤 교체 (쓰는 도중 다른 프로세스가 깨진 파일을 읽지 않도록)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def get(self, key, version):
+        """현재 버전의 답변 (없거나 이전 버전이면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry.get("version") == version:
+            return entry["answer"]
+        return None
+
+    def put(self, key, version, answer):
+        """답변 저장 (최대 개수를 넘으면 오래된 답변부터 삭제)"""
+        with self._lock:
+            self._entries[key] = {
+                "version": version,
+                "answer": answer,
+                "created_at": datetime.datetime.now().isoformat(timespec='seconds'),
+            }
+            if len(self._entries) > self.max_entries:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k]["created_at"])
+                for old_key in oldest[:len(self._entries) - self.max_entries]:
+                    del self._entries[old_key]
+            self._save()
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+# utils/product_matching.py
+# 프로그램 설명: 서로 다른 쇼핑몰에 올라온 같은 상품을 찾아 묶는 유틸리티 함수들
+#
+# 1단계: productId가 같은 상품은 같은 상품으로 묶음
+# 2단계: 정규화한 상품명의 글자 3-gram에 MinHash-LSH를 적용해 비슷한 상품명 후보만 비교
+#        (브랜드/제조사 또는 용량·저항 같은 숫자 규격이 서로 다르면 묶지 않음)
+# LSH 덕분에 모든 상품 쌍을 비교하지 않으므로 수만 개 상품에도 사용할 수 있습니다.
+
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+# MinHash / LSH 설정 (밴드 16개 x 4행 → 유사도 약 0.5 이상부터 후보가 되고, 0.7 이상이면 같은 상품)
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SIMILARITY_THRESHOLD = 0.7
+SHINGLE_SIZE = 3
+MAX_BUCKET_SIZE = 200          # 이보다 큰 버킷(흔한 상품명)은 다른 밴드 값으로 더 잘게 나눠서 비교
+COMMON_TOKEN_RATIO = 0.5       # 전체 상품명의 절반 이상에 나오는 단어는 구분력이 없어 제거
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(42)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+def normalize_title(title):
+    """
+    상품명을 비교용으로 정규화하는 함수
+
+    - [쇼핑몰명], (옵션) 처럼 괄호로 감싼 부분 제거
+    - 영문 소문자화, 한글/영문/숫자 외 문자 제거
+    """
+    if not isinstance(title, str):
+        return ""
+    title = re.sub(r"\[[^\]]*\]|\([^)]*\)|【[^】]*】", " ", title)
+    title = re.sub(r"[^0-9a-zA-Z가-힣]+", " ", title.lower())
+    return re.sub(r"\s+", " ", title).strip()
+
+def extract_specs(title):
+    """상품명에서 숫자 규격 추출 (예: '0.6옴', '30ml', '2개')"""
+    if not isinstance(title, str):
+        return frozenset()
+    # 단위 뒤에 한글이 바로 붙어도 인식 ('0.6옴코일'), 영문/숫자가 이어지면 단위가 아님 ('5gram')
+    specs = re.findall(r"\d+(?:\.\d+)?\s*(?:옴|ohm|ml|mg|mah|w|g|개|입|팩)(?![a-z0-9])", title.lower())
+    return frozenset(spec.replace(" ", "") for spec in specs)
+
+def _normalize_key(value):
+    """브랜드/제조사/productId 비교용 정규화 (비어 있으면 빈 문자열)"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    value = str(value).strip().lower()
+    if value.endswith(".0"):
+        value = value[:-2]
+    return "" if value in ("nan", "none") else value
+
+def title_shingles(title, size=SHINGLE_SIZE):
+    """공백을 뺀 상품명의 글자 n-gram 해시 배열"""
+    text = title.replace(" ", "")
+    if len(text) < size:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.array([zlib.crc32(g.encode("utf-8")) % _MERSENNE_PRIME for g in grams], dtype=np.uint64)
+
+def minhash_signature(shingles):
+    """shingle 해시 배열의 MinHash 서명 (빈 배열이면 None)"""
+    if len(shingles) == 0:
+        return None
+    hashed = (_PERM_A[:, None] * shingles[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return hashed.min(axis=1)
+
+class _UnionFind:
+    """
+    그룹별 속성(브랜드, 제조사, 규격) 집합을 함께 관리하는 union-find
+
+    attributes[i]는 i번 상품의 속성 튜플이며 빈 값('' 또는 빈 frozenset)은 '모름'으로 봅니다.
+    """
+
+    def __init__(self, attributes):
+        self.parent = list(range(len(attributes)))
+        self.values = [tuple({value} if value else set() for value in attrs) for attrs in attributes]
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def conflicting(self, i, j):
+        """두 그룹을 합치면 한 그룹에 서로 다른 브랜드/제조사/규격이 생기는지 확인"""
+        values_i, values_j = self.values[self.find(i)], self.values[self.find(j)]
+        return any(a and b and len(a | b) > 1 for a, b in zip(values_i, values_j))
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            root, child = min(root_i, root_j), max(root_i, root_j)
+            self.parent[child] = root
+            self.values[root] = tuple(a | b for a, b in zip(self.values[root], self.values[child]))
+
+def split_bucket(members, signatures, band, sort_key=None, max_size=MAX_BUCKET_SIZE):
+    """
+    너무 큰 LSH 버킷을 다른 밴드 값까지 같은 상품끼리 다시 나누는 함수
+
+    모든 밴드 값이 같으면(서명이 같은 상품들) sort_key 순으로 정렬해 max_size 크기로 나누되,
+    이웃한 묶음이 한 상품씩 겹치게 해서 묶음 사이도 연결되도록 합니다.
+    """
+    pending = [(members, 1)]
+    while pending:
+        members, depth = pending.pop()
+        if len(members) <= max_size:
+            yield members
+        elif depth < LSH_BANDS:
+            next_band = (band + depth) % LSH_BANDS
+            sub_buckets = {}
+            for i in members:
+                key = signatures[i][next_band * LSH_ROWS:(next_band + 1) * LSH_ROWS].tobytes()
+                sub_buckets.setdefault(key, []).append(i)
+            pending.extend((sub, depth + 1) for sub in sub_buckets.values() if len(sub) >= 2)
+        else:
+            members = sorted(members, key=sort_key)
+            for start in range(0, len(members) - 1, max_size - 1):
+                yield members[start:start + max_size]
+
+def match_products(df, threshold=SIMILARITY_THRESHOLD):
+    """
+    쇼핑 데이터에서 같은 상품을 찾아 상품그룹 번호를 붙이는 함수
+
+    Args:
+        df (pd.DataFrame): clean_and_process_shopping_data 결과 (title, productId, brand, maker 사용)
+        threshold (float): 같은 상품으로 볼 상품명 유사도 (MinHash 추정 Jaccard)
+
+    Returns:
+        pd.DataFrame: '상품그룹', '매칭방식' 컬럼이 추가된 DataFrame
+    """
+    if df.empty or 'title' not in df.columns:
+        return df
+
+    n = len(df)
+    method = np.array(["단독"] * n, dtype=object)
+
+    # 브랜드/제조사/규격 (둘 다 있는데 서로 다르면 다른 상품 - 그룹 단위로 확인해 간접적으로도 섞이지 않게 함)
+    brands = df['brand'].map(_normalize_key).tolist() if 'brand' in df.columns else [""] * n
+    makers = df['maker'].map(_normalize_key).tolist() if 'maker' in df.columns else [""] * n
+    specs = df['title'].map(extract_specs).tolist()
+    uf = _UnionFind(list(zip(brands, makers, specs)))
+
+    # 1단계: productId 기준 묶기 (같은 productId는 속성이 달라도 같은 상품)
+    if 'productId' in df.columns:
+        first_seen = {}
+        for i, product_id in enumerate(df['productId'].map(_normalize_key)):
+            if not product_id:
+                continue
+            if product_id in first_seen:
+                uf.union(first_seen[product_id], i)
+                method[i] = method[first_seen[product_id]] = "productId"
+            else:
+                first_seen[product_id] = i
+
+    # 2단계: 상품명 MinHash-LSH (구분력 없는 흔한 단어는 제거)
+    titles = df['title'].map(normalize_title).tolist()
+    token_counts = pd.Series([token for title in titles for token in set(title.split())]).value_counts()
+    common_tokens = set(token_counts[token_counts > max(2, n * COMMON_TOKEN_RATIO)].index)
+    titles = [" ".join(t for t in title.split() if t not in common_tokens) for title in titles]
+
+    signatures = [minhash_signature(title_shingles(title)) for title in titles]
+    buckets = {}
+    for i, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for band in range(LSH_BANDS):
+            key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+            buckets.setdefault(key, []).append(i)
+
+    # 큰 버킷은 나눠서 비교 (같은 브랜드/제조사/규격끼리 이웃하도록 정렬 기준 지정)
+    def candidate_groups():
+        for (band, _), members in buckets.items():
+            if len(members) < 2:
+                continue
+            yield from split_bucket(members, signatures, band,
+                                    sort_key=lambda i: (brands[i], makers[i], sorted(specs[i])))
+
+    checked = set()
+    for members in candidate_groups():
+        for a_index, i in enumerate(members):
+            for j in members[a_index + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if uf.find(i) == uf.find(j) or uf.conflicting(i, j):
+                    continue
+                similarity = float(np.mean(signatures[i] == signatures[j]))
+                if similarity >= threshold:
+                    uf.union(i, j)
+                    for k in (i, j):
+                        if method[k] == "단독":
+                            method[k] = "유사상품명"
+
+    # 그룹 번호를 0부터 순서대로 부여
+    roots = [uf.find(i) for i in range(n)]
+    group_ids = pd.Series(roots).astype('category').cat.codes.to_numpy()
+
+    df_matched = df.copy()
+    df_matched['상품그룹'] = group_ids
+    df_matched['매칭방식'] = method
+    return df_matched
+
+def summarize_product_groups(df, min_malls=2):
+    """
+    상품그룹별 쇼핑몰 간 가격 차이 요약
+
+    Args:
+        df (pd.DataFrame): match_products 결과
+        min_malls (int): 요약에 포함할 최소 쇼핑몰 수
+
+    Returns:
+        pd.DataFrame: 상품그룹, 대표상품명, 쇼핑몰수, 상품수, 최저가, 최고가, 가격차, 가격차율 (가격차 큰 순)
+    """
+    columns = ['상품그룹', '대표상품명', '쇼핑몰수', '상품수', '최저가', '최고가', '가격차', '가격차율']
+    if df.empty or '상품그룹' not in df.columns or 'lprice' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    priced = df[df['lprice'] > 0].reset_index(drop=True)
+    groups = priced.groupby('상품그룹', observed=True).agg(
+        쇼핑몰수=('mallName', 'nunique'),
+        상품수=('lprice', 'size'),
+        최저가=('lprice', 'min'),
+        최고가=('lprice', 'max'),
+    )
+    groups = groups[groups['쇼핑몰수'] >= min_malls]
+    if groups.empty:
+        return pd.DataFrame(columns=columns)
+
+    # 대표상품명은 최저가 상품의 이름
+    cheapest = priced.loc[priced.groupby('상품그룹', observed=True)['lprice'].idxmin(), ['상품그룹', 'title']]
+    groups = groups.join(cheapest.set_index('상품그룹')['title'].rename('대표상품명'))
+    groups['가격차'] = groups['최고가'] - groups['최저가']
+    groups['가격차율'] = (groups['가격차'] / groups['최저가'] * 100).round(1)
+    groups = groups.reset_index().sort_values(['가격차', '쇼핑몰수'], ascending=False)
+    return groups[columns]
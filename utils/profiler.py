@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# utils/profiler.py
+# 프로그램 설명: 한 스레드(Streamlit 스크립트 실행 스레드)의 호출 스택을 주기적으로 기록하는 샘플링 프로파일러
+#
+# 별도 스레드가 interval 초마다 sys._current_frames() 로 대상 스레드의 스택을 읽어 횟수를 셉니다.
+# 대상 코드는 수정하지 않으며, start() 하지 않으면 아무 비용도 없습니다.
+# 결과 형식
+#   - 함수별 self/total 샘플 표 (top_functions)
+#   - folded stacks 텍스트 (flamegraph.pl, speedscope 에서 열 수 있음)
+#   - speedscope JSON (https://www.speedscope.app 에서 열기)
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.005    # 샘플링 주기 (초)
+MAX_STACK_DEPTH = 200
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _short_path(filename):
+    """프로젝트 파일은 상대 경로, 외부 라이브러리는 마지막 두 경로만 표시"""
+    if filename.startswith(_ROOT + os.sep):
+        return os.path.relpath(filename, _ROOT)
+    parts = filename.replace("\\", "/").split("/")
+    return "/".join(parts[-2:])
+
+class SamplingProfiler:
+    """대상 스레드의 스택 샘플 수집기"""
+
+    def __init__(self, thread_id=None, interval=DEFAULT_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()     # (프레임, ...) 루트 → 말단 순서 : 샘플 수
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.time() - self.started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append((code.co_name, _short_path(code.co_filename), code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+
+    @property
+    def sample_count(self):
+        return sum(self.stacks.values())
+
+    def _ms_per_sample(self):
+        """샘플 하나가 나타내는 시간 (실제 측정 시간 기준, 샘플링 지연 보정)"""
+        return self.duration * 1000 / self.sample_count if self.sample_count else 0.0
+
+    def top_functions(self, limit=30):
+        """
+        함수별 샘플 집계 (self: 그 함수가 직접 실행 중, total: 호출 스택 어딘가에 포함)
+
+        Returns:
+            list: dict 목록 (self 샘플이 많은 순)
+        """
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for frame in set(stack):
+                total_counts[frame] += count
+
+        total = self.sample_count or 1
+        ms = self._ms_per_sample()
+        rows = []
+        for frame, total_count in total_counts.items():
+            name, filename, line = frame
+            self_count = self_counts.get(frame, 0)
+            rows.append({
+                "함수": name,
+                "위치": f"{filename}:{line}",
+                "self(ms)": round(self_count * ms, 1),
+                "self(%)": round(self_count * 100 / total, 1),
+                "total(ms)": round(total_count * ms, 1),
+                "total(%)": round(total_count * 100 / total, 1),
+            })
+        rows.sort(key=lambda row: (row["self(ms)"], row["total(ms)"]), reverse=True)
+        return rows[:limit]
+
+    def to_folded(self):
+        """folded stacks 형식 ('루트;...;말단 샘플수' 한 줄씩)"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            names = ";".join(f"{name} ({filename}:{line})" for name, filename, line in stack)
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self, name="rerun"):
+        """speedscope sampled 프로파일 JSON 문자열"""
+        frames, index = [], {}
+        samples, weights = [], []
+        ms = self._ms_per_sample()
+        for stack, count in self.stacks.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(round(count * ms, 3))
+
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(self.duration * 1000, 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "utils.profiler",
+        }, ensure_ascii=False)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# utils/query_router.py
+# 프로그램 설명: 챗봇 질문을 '간단한 질문'(팁/조언/일반 상식)과 '복잡한 질문'(기사 분석 필요)으로 나누는 로컬 분류기
+#
+# 1단계: 키워드 규칙 (복잡한 질문 키워드만 있으면 바로 COMPLEX)
+# 2단계: 질문 임베딩과 유형별 예시 질문 임베딩 중심(centroid)의 코사인 유사도 비교 (nearest centroid)
+# 간단한 질문 키워드는 금연 팁에만 쓰이는 표현으로 한정하고, 임베딩 모델이 있으면 모델도 간단한 질문 쪽일 때만
+# 기사 검색을 생략합니다. 판단이 애매하면 기사 검색을 하는 '복잡한 질문'으로 보냅니다 (답변 품질 우선).
+
+import numpy as np
+
+SIMPLE = "simple"
+COMPLEX = "complex"
+
+# 중심 간 유사도 차이가 이보다 작으면 애매한 질문으로 보고 COMPLEX
+CENTROID_MARGIN = 0.03
+
+# '방법', '추천', '뜻' 같은 일반적인 표현은 분석형 질문에도 나오므로 제외 (금연 팁에만 쓰이는 표현)
+SIMPLE_KEYWORDS = ["금연 팁", "금연팁", "금연하는 방법", "금연 방법", "끊는 방법", "끊는 법", "어떻게 끊",
+                   "금연 요령", "금연에 좋은", "금연 후 주의사항", "금단 증상", "금단증상", "흡연 욕구"]
+COMPLEX_KEYWORDS = ["정책", "효과", "비교", "추이", "통계", "현황", "연구", "영향", "지역별", "연도별", "법안",
+                    "발표", "기사", "최근", "민원", "규제", "개정", "조사", "결과", "자치구", "서울시"]
+
+SIMPLE_EXAMPLES = [
+    "금연 팁을 알려주세요!",
+    "금연하는 방법은?",
+    "담배를 어떻게 끊을 수 있나요?",
+    "금연에 좋은 음식은?",
+    "금연 후 주의사항은?",
+    "금단 증상을 줄이는 요령이 있나요?",
+    "니코틴 패치는 어떻게 사용하나요?",
+    "흡연 욕구가 생길 때 할 수 있는 일은?",
+    "전자담배와 일반 담배 차이가 뭔가요?",
+    "간접흡연이 무엇인가요?",
+]
+COMPLEX_EXAMPLES = [
+    "가장 최근에 발표된 금연 정책에는 어떤 내용이 포함되어 있나요?",
+    "흡연 부스 설치가 민원 감소에 효과가 있었나요?",
+    "담배와 관련된 건강 피해는 어느 정도인가요?",
+    "서울에서 흡연 구역이 가장 많은 자치구는 어디인가요?",
+    "지역별 흡연율을 비교해주세요",
+    "연도별 흡연율 추이는 어떤가요?",
+    "전자담배 규제 법안은 어떻게 바뀌었나요?",
+    "담배 가격 인상이 흡연율에 미친 영향은?",
+    "청소년 흡연 관련 최근 조사 결과는?",
+    "금연 구역 확대 정책에 대한 기사 내용을 정리해주세요",
+]
+
+def route_by_rules(question):
+    """키워드 규칙으로 판별 (양쪽 모두 해당하거나 해당 없음이면 None)"""
+    simple = any(keyword in question for keyword in SIMPLE_KEYWORDS)
+    complex_ = any(keyword in question for keyword in COMPLEX_KEYWORDS)
+    if simple and not complex_:
+        return SIMPLE
+    if complex_ and not simple:
+        return COMPLEX
+    return None
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class QueryRouter:
+    """키워드 규칙 + 임베딩 nearest-centroid 질문 분류기"""
+
+    def __init__(self, embedding_function=None, margin=CENTROID_MARGIN):
+        self.embedding_function = embedding_function
+        self.margin = margin
+        self.centroids = None
+        if embedding_function is not None:
+            simple = _normalize(embedding_function(SIMPLE_EXAMPLES)).mean(axis=0)
+            complex_ = _normalize(embedding_function(COMPLEX_EXAMPLES)).mean(axis=0)
+            self.centroids = _normalize(np.vstack([simple, complex_]))
+
+    def route(self, question):
+        """
+        질문 유형 판별
+
+        Returns:
+            tuple: (SIMPLE 또는 COMPLEX, 판별 근거 'rule' / 'rule+model' / 'model' / 'default')
+        """
+        label = route_by_rules(question)
+        if label == COMPLEX:
+            return COMPLEX, "rule"
+        if self.centroids is None:
+            return (SIMPLE, "rule") if label == SIMPLE else (COMPLEX, "default")
+
+        embedding = _normalize(self.embedding_function([question]))[0]
+        simple_score, complex_score = self.centroids @ embedding
+        if label == SIMPLE:
+            # 키워드만으로는 기사 검색을 생략하지 않음 (모델도 간단한 질문 쪽이어야 함)
+            return (SIMPLE, "rule+model") if simple_score > complex_score else (COMPLEX, "model")
+        if simple_score - complex_score > self.margin:
+            return SIMPLE, "model"
+        if complex_score - simple_score > self.margin:
+            return COMPLEX, "model"
+        return COMPLEX, "default"
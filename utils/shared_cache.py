@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+# utils/shared_cache.py
+# 프로그램 설명: 여러 앱 프로세스(레플리카)가 함께 쓰는 디스크 캐시
+#
+# @st.cache_data / @st.cache_resource 는 프로세스마다 따로 있어서 레플리카를 늘리면 캐시가 비어 있는 상태로 시작합니다.
+# 이 캐시는 로컬 SQLite 파일(WAL 모드, 파일 잠금)에 값을 저장하므로 같은 서버의 모든 프로세스가 공유합니다.
+#   - 항목별 TTL (만료된 항목은 조회 시 삭제)
+#   - 전체 크기가 max_bytes 를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (EVICT_INTERVAL 번 쓸 때마다 확인)
+#   - 캐시 오류(잠금 시간 초과, 손상된 항목 등)는 앱 오류로 만들지 않음: 읽기 실패는 캐시 없음, 쓰기 실패는 무시
+#
+# 환경변수
+#   SHARED_CACHE_BACKEND   ← 'sqlite' (기본) 또는 'none' (캐시 사용 안 함)
+#   SHARED_CACHE_PATH      ← SQLite 파일 경로 (기본 data/cache/shared_cache.sqlite3)
+#   SHARED_CACHE_MAX_MB    ← 최대 크기 (기본 256)
+
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+import functools
+from pathlib import Path
+
+SHARED_CACHE_PATH = "data/cache/shared_cache.sqlite3"
+DEFAULT_MAX_MB = 256
+LOCK_TIMEOUT = 30           # 다른 프로세스가 쓰는 중일 때 기다리는 최대 시간 (초)
+TOUCH_INTERVAL = 60         # 마지막 사용 시각 갱신 최소 간격 (초, 조회마다 쓰기가 일어나지 않도록)
+EVICT_INTERVAL = 50         # 크기 확인(전체 SUM)은 이 횟수만큼 쓸 때마다 한 번 (또는 한도의 EVICT_BYTES_RATIO 만큼 쓴 뒤)
+EVICT_BYTES_RATIO = 0.05
+
+# 읽은 값을 복원하지 못하는 경우 (손상된 항목, 코드 변경으로 없어진 클래스 등)
+_UNPICKLE_ERRORS = (pickle.UnpicklingError, AttributeError, EOFError, ImportError, IndexError, TypeError, ValueError)
+# 값을 저장할 수 없는 경우 (pickle 불가능한 객체)
+_PICKLE_ERRORS = (pickle.PicklingError, AttributeError, TypeError, RecursionError)
+
+def make_key(*parts):
+    """캐시 키 생성 (JSON으로 표현한 뒤 해시, JSON으로 표현할 수 없는 값은 str 사용)"""
+    text = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class SQLiteCache:
+    """SQLite 파일 기반 프로세스 간 공유 캐시"""
+
+    def __init__(self, path=SHARED_CACHE_PATH, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        # 마지막 크기 확인 이후 이 프로세스에서 쓴 횟수/크기 (처음 쓸 때 한 번 확인)
+        self._writes_since_evict = EVICT_INTERVAL
+        self._bytes_since_evict = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+
+    def _connection(self):
+        """스레드별 SQLite 연결 (WAL 모드: 읽기는 쓰기를 기다리지 않음)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key, default=None):
+        """값 조회 (없거나 만료되었거나 읽을 수 없으면 default)"""
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return default
+
+            value, expires_at, accessed_at = row
+            now = time.time()
+            if expires_at is not None and expires_at <= now:
+                with conn:
+                    conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                return default
+            if now - accessed_at > TOUCH_INTERVAL:
+                with conn:
+                    conn.execute("UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                                 (now, namespace, key))
+        except sqlite3.Error:
+            return default
+
+        try:
+            return pickle.loads(value)
+        except _UNPICKLE_ERRORS:
+            # 복원할 수 없는 항목은 지우고 캐시 없음으로 처리
+            self.delete(namespace, key)
+            return default
+
+    def set(self, namespace, key, value, ttl=None):
+        """값 저장 (ttl 초 후 만료, None이면 크기 제한으로만 삭제 / 저장할 수 없으면 무시)"""
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except _PICKLE_ERRORS:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, size, expires_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (namespace, key, blob, len(blob), now + ttl if ttl else None, now)
+                )
+                self._writes_since_evict += 1
+                self._bytes_since_evict += len(blob)
+                if (self._writes_since_evict >= EVICT_INTERVAL
+                        or self._bytes_since_evict >= self.max_bytes * EVICT_BYTES_RATIO):
+                    self._evict(conn, now)
+                    self._writes_since_evict = self._bytes_since_evict = 0
+        except sqlite3.Error:
+            pass
+
+    def delete(self, namespace, key):
+        """항목 하나 삭제 (실패해도 무시)"""
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn, now):
+        """만료 항목 삭제 후, 크기 한도를 넘으면 오래 사용하지 않은 항목부터 삭제 (전체 크기 합계를 읽으므로 가끔만 호출)"""
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for namespace, key, size in conn.execute(
+                "SELECT namespace, key, size FROM entries ORDER BY accessed_at"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((namespace, key))
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", victims)
+
+    def get_or_set(self, namespace, key, compute, ttl=None, should_cache=None):
+        """캐시에 없으면 compute()로 계산해 저장 후 반환 (should_cache(값)이 False면 저장하지 않음)"""
+        missing = object()
+        value = self.get(namespace, key, missing)
+        if value is not missing:
+            return value
+        value = compute()
+        if should_cache is None or should_cache(value):
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def clear(self, namespace=None):
+        """전체 또는 namespace 항목 삭제"""
+        conn = self._connection()
+        with conn:
+            if namespace is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+    def stats(self):
+        """namespace별 항목 수와 크기"""
+        rows = self._connection().execute(
+            "SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace").fetchall()
+        return {namespace: {"entries": count, "bytes": size} for namespace, count, size in rows}
+
+class NullCache:
+    """캐시를 사용하지 않을 때의 대체 구현 (항상 다시 계산)"""
+
+    def get(self, namespace, key, default=None):
+        return default
+
+    def set(self, namespace, key, value, ttl=None):
+        pass
+
+    def delete(self, namespace, key):
+        pass
+
+    def get_or_set(self, namespace, key, compute, ttl=None, should_cache=None):
+        return compute()
+
+    def clear(self, namespace=None):
+        pass
+
+    def stats(self):
+        return {}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_shared_cache():
+    """환경변수 설정에 맞는 공유 캐시 (프로세스당 하나, 열 수 없으면 NullCache)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = os.getenv("SHARED_CACHE_BACKEND", "sqlite").lower()
+                if backend == "none":
+                    _cache = NullCache()
+                else:
+                    try:
+                        max_mb = float(os.getenv("SHARED_CACHE_MAX_MB", DEFAULT_MAX_MB))
+                        _cache = SQLiteCache(os.getenv("SHARED_CACHE_PATH", SHARED_CACHE_PATH),
+                                             int(max_mb * 1024 * 1024))
+                    except (OSError, sqlite3.Error):
+                        _cache = NullCache()
+    return _cache
+
+def shared_cached(namespace, ttl=None):
+    """
+    함수 결과를 공유 캐시에 저장하는 데코레이터 (인자는 JSON 또는 str로 표현 가능해야 함)
+
+    사용 예:
+        @shared_cached("district_stats", ttl=3600)
+        def load_stats(path): ...
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = make_key(fn.__module__, fn.__qualname__, args, kwargs)
+            return get_shared_cache().get_or_set(namespace, key, lambda: fn(*args, **kwargs), ttl)
+        return wrapper
+    return decorator
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# utils/shopping_export.py
+# 프로그램 설명: 네이버 쇼핑 데이터를 엑셀(XLSX)/CSV 파일로 내보내는 유틸리티 함수들
+#
+# 저장된 CSV를 일정 행 수(chunk)씩 읽어 바로 출력에 쓰기 때문에,
+# 여러 검색 기록을 합친 큰 데이터도 원본 DataFrame 전체를 메모리에 올리지 않고 내보낼 수 있습니다.
+#   - CSV  : chunk 단위로 이어 쓰기
+#   - XLSX : openpyxl write-only 모드 (행을 쓰는 즉시 임시 파일로 내려감)
+# 결과는 서버 임시 디렉터리의 파일로 만들어지고(공개 경로 아님), 다운로드 버튼을 누를 때만 읽어서 전달합니다.
+# 오래된 임시 파일은 다음 내보내기 때 정리합니다 (EXPORT_FILE_TTL).
+
+import os
+import re
+import time
+import datetime
+import tempfile
+from pathlib import Path
+import pandas as pd
+
+EXPORT_CHUNK_ROWS = 5000
+XLSX_MAX_ROWS = 1_048_575           # 엑셀 시트 최대 행 수 (헤더 제외)
+EXPORT_TEMP_DIR = Path(tempfile.gettempdir()) / "naver_shopping_exports"
+EXPORT_FILE_TTL = 3600              # 내보내기 임시 파일 보관 시간 (초)
+
+# 저장 파일명의 검색 시각 (naver_shopping_<검색어>_YYYYMMDD_HHMMSS.csv)
+_TIMESTAMP_PATTERN = re.compile(r"_(\d{8}_\d{6})\.csv$")
+
+def _snapshot_time(file_path):
+    """저장 파일명에서 검색 시각 추출 (없으면 빈 문자열)"""
+    match = _TIMESTAMP_PATTERN.search(Path(file_path).name)
+    if not match:
+        return ""
+    return datetime.datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+
+def _union_columns(file_paths):
+    """여러 CSV의 헤더만 읽어 전체 컬럼 목록 생성 (처음 나온 순서 유지)"""
+    columns = []
+    for file_path in file_paths:
+        for col in pd.read_csv(file_path, nrows=0, encoding='utf-8-sig').columns:
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+def iter_snapshot_chunks(file_paths, chunksize=EXPORT_CHUNK_ROWS):
+    """
+    저장된 쇼핑 데이터 CSV들을 chunk 단위로 읽는 제너레이터
+
+    여러 파일을 합칠 때는 컬럼을 통일하고 '검색파일', '검색시각' 컬럼을 앞에 붙입니다.
+
+    Args:
+        file_paths (list): CSV 파일 경로 목록
+        chunksize (int): 한 번에 읽을 행 수
+
+    Yields:
+        pd.DataFrame: 최대 chunksize 행의 DataFrame
+    """
+    columns = _union_columns(file_paths)
+    for file_path in file_paths:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, encoding='utf-8-sig'):
+            chunk = chunk.reindex(columns=columns)
+            if len(file_paths) > 1:
+                chunk.insert(0, '검색시각', _snapshot_time(file_path))
+                chunk.insert(0, '검색파일', Path(file_path).name)
+            yield chunk
+
+def iter_mall_summary_chunks(file_paths, chunksize=EXPORT_CHUNK_ROWS):
+    """
+    쇼핑몰별 가격 집계를 chunk 단위로 누적해 계산하는 제너레이터
+
+    집계 결과(쇼핑몰 수만큼의 행)만 메모리에 유지하므로 원본 크기와 관계없이 동작합니다.
+
+    Yields:
+        pd.DataFrame: 쇼핑몰, 상품수, 평균가격, 최저가, 최고가, 검색파일수
+    """
+    stats = {}   # 쇼핑몰 → [상품수, 가격합, 최저가, 최고가, 검색파일 set]
+    for file_path in file_paths:
+        reader = pd.read_csv(file_path, usecols=lambda col: col in ('mallName', 'lprice'),
+                             chunksize=chunksize, encoding='utf-8-sig')
+        for chunk in reader:
+            if 'mallName' not in chunk.columns or 'lprice' not in chunk.columns:
+                break
+            prices = pd.to_numeric(chunk['lprice'], errors='coerce')
+            partial = chunk[prices > 0].assign(lprice=prices).groupby('mallName')['lprice'].agg(
+                ['count', 'sum', 'min', 'max'])
+            for mall, row in partial.iterrows():
+                entry = stats.setdefault(mall, [0, 0, row['min'], row['max'], set()])
+                entry[0] += row['count']
+                entry[1] += row['sum']
+                entry[2] = min(entry[2], row['min'])
+                entry[3] = max(entry[3], row['max'])
+                entry[4].add(Path(file_path).name)
+
+    if not stats:
+        return
+
+    yield pd.DataFrame([
+        {'쇼핑몰': mall, '상품수': int(count), '평균가격': int(round(total / count)),
+         '최저가': int(low), '최고가': int(high), '검색파일수': len(files)}
+        for mall, (count, total, low, high, files) in stats.items()
+    ]).sort_values('상품수', ascending=False)
+
+def write_csv_stream(chunks, output):
+    """
+    chunk들을 CSV 하나로 이어 쓰는 함수 (엑셀에서 한글이 깨지지 않도록 UTF-8 BOM 포함)
+
+    Args:
+        output: 바이너리 파일 객체 (io.BytesIO 또는 open(..., 'wb'))
+
+    Returns:
+        int: 저장한 행 수
+    """
+    rows = 0
+    output.write('\ufeff'.encode('utf-8'))
+    for chunk in chunks:
+        output.write(chunk.to_csv(index=False, header=(rows == 0)).encode('utf-8'))
+        rows += len(chunk)
+    return rows
+
+def write_xlsx_stream(chunks, output, sheet_name="data"):
+    """
+    chunk들을 openpyxl write-only 모드로 엑셀 파일에 쓰는 함수 (output: 파일 경로 또는 바이너리 파일 객체)
+
+    엑셀 시트 최대 행 수를 넘으면 다음 시트(data_2, data_3 ...)로 이어서 씁니다.
+
+    Returns:
+        int: 저장한 행 수
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheet_count = None, 0, 0
+    rows = 0
+    for chunk in chunks:
+        header = [str(col) for col in chunk.columns]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for values in chunk.itertuples(index=False, name=None):
+            if sheet is None or sheet_rows >= XLSX_MAX_ROWS:
+                sheet_count += 1
+                sheet = workbook.create_sheet(sheet_name if sheet_count == 1 else f"{sheet_name}_{sheet_count}")
+                sheet.append(header)
+                sheet_rows = 0
+            sheet.append(list(values))
+            sheet_rows += 1
+            rows += 1
+
+    if sheet is None:
+        workbook.create_sheet(sheet_name)
+    workbook.save(output)
+    return rows
+
+def cleanup_export_files(max_age=EXPORT_FILE_TTL, export_dir=EXPORT_TEMP_DIR):
+    """max_age 초보다 오래된 내보내기 임시 파일 삭제"""
+    if not export_dir.exists():
+        return
+    cutoff = time.time() - max_age
+    for path in export_dir.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+def remove_export_file(path):
+    """내보내기 임시 파일 삭제 (이미 없으면 무시)"""
+    try:
+        Path(path).unlink()
+    except OSError:
+        pass
+
+def export_shopping_data(chunk_factory, name, fmt, export_dir=EXPORT_TEMP_DIR):
+    """
+    쇼핑 데이터를 XLSX 또는 CSV 임시 파일로 만드는 함수 (파일 내용을 메모리에 올리지 않음)
+
+    Args:
+        chunk_factory (callable): 새 chunk 제너레이터를 반환하는 함수
+        name (str): 파일명에 사용할 이름
+        fmt (str): 'xlsx' 또는 'csv'
+
+    Returns:
+        tuple: (다운로드 파일명, 임시 파일 경로, 행 수)
+    """
+    if fmt not in ("xlsx", "csv"):
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+    safe_name = "".join(c for c in name if c.isalnum() or c in ('-', '_')).rstrip() or "export"
+    file_name = f"{safe_name}_{datetime.datetime.now():%Y%m%d_%H%M%S}.{fmt}"
+
+    export_dir.mkdir(parents=True, exist_ok=True)
+    cleanup_export_files(export_dir=export_dir)
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", dir=export_dir)
+    try:
+        with os.fdopen(fd, "wb") as output:
+            if fmt == "xlsx":
+                rows = write_xlsx_stream(chunk_factory(), output)
+            else:
+                rows = write_csv_stream(chunk_factory(), output)
+    except BaseException:
+        os.remove(path)
+        raise
+    return file_name, Path(path), rows
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# utils/singleflight.py
+# 프로그램 설명: 같은 작업이 동시에 여러 번 요청되면 한 번만 실행하고 결과를 모든 요청자에게 나눠주는 유틸리티
+#
+# 여러 세션이 같은 검색어/같은 질문을 동시에 요청할 때 외부 API 호출이 한 번만 일어나도록 합니다.
+# 실행이 끝난 결과는 보관하지 않으므로(캐시 아님), 이후 요청은 다시 실행됩니다.
+# 기다리는 요청은 짧은 간격으로 깨어나 취소 여부와 제한 시간을 확인합니다 (먼저 실행한 요청이 멈춰도 함께 멈추지 않음).
+
+import time
+import threading
+
+# 기다리는 요청이 취소 여부/제한 시간을 확인하는 간격 (초)
+WAIT_POLL_INTERVAL = 0.5
+
+class SingleFlightCancelled(Exception):
+    """결과를 기다리던 요청이 취소됨"""
+
+class SingleFlightTimeout(Exception):
+    """제한 시간 안에 다른 요청의 실행 결과가 오지 않음"""
+
+class _Call:
+    """실행 중인 작업 한 건 (완료 시 결과 또는 예외를 기록)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """키별로 동시에 하나의 실행만 허용하고 결과를 공유하는 객체"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, args=(), kwargs=None, on_wait=None, is_cancelled=None, timeout=None):
+        """
+        key에 해당하는 작업이 실행 중이면 그 결과를 기다리고, 아니면 직접 실행하는 함수
+
+        Args:
+            key: 같은 작업인지 판단할 키 (hashable)
+            fn (callable): 실행할 함수
+            args (tuple), kwargs (dict): fn 인자 (먼저 도착한 요청의 인자로 실행)
+            on_wait (callable): 다른 요청의 실행 결과를 기다리게 될 때 호출
+            is_cancelled (callable): 기다리는 동안 True를 반환하면 대기를 중단
+            timeout (float): 다른 요청의 실행 결과를 기다리는 최대 시간 (초, None이면 제한 없음)
+
+        Returns:
+            tuple: (결과, 다른 요청의 실행 결과를 받았는지 여부)
+
+        Raises:
+            fn에서 발생한 예외 (기다리던 요청자 모두에게 같은 예외 전달)
+            SingleFlightCancelled: 기다리는 도중 취소됨
+            SingleFlightTimeout: timeout 안에 결과가 오지 않음
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                call.waiters += 1
+                leader = False
+
+        if not leader:
+            if on_wait is not None:
+                on_wait()
+            self._wait(call, is_cancelled, timeout)
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **(kwargs or {}))
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def _wait(self, call, is_cancelled, timeout):
+        """call이 끝날 때까지 짧은 간격으로 기다리며 취소 여부와 제한 시간 확인"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait_for = WAIT_POLL_INTERVAL
+            if deadline is not None:
+                wait_for = min(wait_for, max(0.0, deadline - time.time()))
+            if call.done.wait(wait_for):
+                return
+            if is_cancelled is not None and is_cancelled():
+                self._leave(call)
+                raise SingleFlightCancelled("결과를 기다리던 요청이 취소되었습니다")
+            if deadline is not None and time.time() >= deadline:
+                self._leave(call)
+                raise SingleFlightTimeout(f"{timeout}초 안에 같은 요청의 실행 결과가 오지 않았습니다")
+
+    def _leave(self, call):
+        """기다리기를 그만둔 요청을 대기자 수에서 제외"""
+        with self._lock:
+            call.waiters -= 1
+
+    def in_flight(self):
+        """실행 중인 작업 수"""
+        with self._lock:
+            return len(self._calls)
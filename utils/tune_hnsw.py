@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# utils/tune_hnsw.py
+# 프로그램 설명: 뉴스 벡터DB(HNSW 인덱스)의 M / ef_construction / ef_search 값에 따른 정확도(recall)와 속도를 비교하는 도구
+#
+# 컬렉션 문서 일부를 질의용으로 떼어 두고(held-out), 나머지로 설정별 인덱스를 새로 만든 뒤
+# 전수 비교(brute-force) 검색 결과와 비교해 recall@k 와 질의 지연 시간을 측정합니다.
+#   python -m utils.tune_hnsw                                  ← 기본 설정 조합으로 측정 후 data/hnsw_config.json 기록
+#   python -m utils.tune_hnsw --m 8 16 32 --ef-search 10 50 100 --target-recall 0.98
+#   python -m utils.tune_hnsw --apply                          ← 선택된 설정으로 data/chroma_db 컬렉션 재구축
+#
+# data/hnsw_config.json 은 측정 결과 기록이자 --apply 의 입력이며 앱은 이 파일을 읽지 않습니다.
+# HNSW 설정은 재구축 시 컬렉션 메타데이터(hnsw:*)에 저장되고 Chroma가 검색 때 그 값을 사용합니다.
+# 재구축 후에는 앱을 다시 시작해야 새 컬렉션을 사용합니다 (실행 중인 앱은 캐시된 이전 컬렉션 핸들 사용).
+
+import json
+import time
+import datetime
+import itertools
+from pathlib import Path
+import numpy as np
+
+DEFAULT_DB_PATH = "data/chroma_db"
+DEFAULT_COLLECTION = "ciga_articles"
+HNSW_CONFIG_PATH = "data/hnsw_config.json"
+
+DEFAULT_M = [8, 16, 32]
+DEFAULT_EF_CONSTRUCTION = [100, 200]
+DEFAULT_EF_SEARCH = [10, 40, 100]
+DEFAULT_TOP_K = 10
+DEFAULT_QUERY_RATIO = 0.1       # 질의용으로 떼어 둘 문서 비율
+MAX_QUERIES = 200
+ADD_BATCH_SIZE = 500
+
+# 재구축 중 임시 컬렉션 / 재구축 후 보관하는 이전 컬렉션 이름 접미사 (앱의 컬렉션 목록에서 제외)
+REBUILD_SUFFIX = "__rebuild"
+PREVIOUS_SUFFIX = "__previous"
+
+def is_internal_collection(name):
+    """재구축용 임시/이전 컬렉션인지 확인"""
+    return name.endswith((REBUILD_SUFFIX, PREVIOUS_SUFFIX))
+
+def load_collection_data(collection):
+    """컬렉션의 id, 임베딩, 문서, 메타데이터 전체 로드"""
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    return {
+        "ids": list(data["ids"]),
+        "embeddings": np.asarray(data["embeddings"], dtype=np.float32),
+        "documents": list(data["documents"]),
+        "metadatas": list(data["metadatas"]),
+    }
+
+def split_queries(size, ratio=DEFAULT_QUERY_RATIO, max_queries=MAX_QUERIES, seed=42):
+    """질의용(held-out) 인덱스와 인덱스 구축용 인덱스로 분리"""
+    rng = np.random.RandomState(seed)
+    order = rng.permutation(size)
+    n_queries = min(max_queries, max(1, int(size * ratio)))
+    return np.sort(order[:n_queries]), np.sort(order[n_queries:])
+
+def exact_top_k(corpus, queries, k, space="l2"):
+    """
+    전수 비교로 정답 top-k 계산
+
+    Args:
+        corpus (np.ndarray): (문서 수, 차원) 임베딩
+        queries (np.ndarray): (질의 수, 차원) 임베딩
+        k (int): 가져올 개수
+        space (str): 'l2', 'cosine', 'ip' (Chroma hnsw:space 와 동일)
+
+    Returns:
+        np.ndarray: (질의 수, k) corpus 행 번호 (가까운 순)
+    """
+    if space == "cosine":
+        corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = -(queries @ corpus.T)
+    elif space == "ip":
+        scores = -(queries @ corpus.T)
+    else:
+        scores = (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ corpus.T + (corpus ** 2).sum(axis=1)[None, :]
+
+    k = min(k, corpus.shape[0])
+    top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+def hnsw_metadata(space, m, ef_construction, ef_search):
+    """Chroma 컬렉션 생성용 HNSW 메타데이터"""
+    return {
+        "hnsw:space": space,
+        "hnsw:M": m,
+        "hnsw:construction_ef": ef_construction,
+        "hnsw:search_ef": ef_search,
+    }
+
+def build_collection(client, name, data, rows, metadata):
+    """지정한 행만으로 새 컬렉션 구축 (임베딩은 다시 계산하지 않고 그대로 사용)"""
+    collection = client.create_collection(name=name, metadata=metadata)
+    for start in range(0, len(rows), ADD_BATCH_SIZE):
+        batch = rows[start:start + ADD_BATCH_SIZE]
+        collection.add(
+            ids=[data["ids"][i] for i in batch],
+            embeddings=data["embeddings"][batch].tolist(),
+            documents=[data["documents"][i] for i in batch],
+            metadatas=[data["metadatas"][i] or None for i in batch],
+        )
+    return collection
+
+def benchmark_setting(client, data, query_rows, corpus_rows, truth_ids, space, m, ef_construction, ef_search, k):
+    """설정 하나로 인덱스를 만들고 recall@k / 지연 시간 측정"""
+    name = f"hnsw_tune_{m}_{ef_construction}_{ef_search}"
+    build_start = time.perf_counter()
+    collection = build_collection(client, name, data, corpus_rows,
+                                  hnsw_metadata(space, m, ef_construction, ef_search))
+    build_seconds = time.perf_counter() - build_start
+
+    latencies, hits = [], 0
+    try:
+        for row, truth in zip(query_rows, truth_ids):
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[data["embeddings"][row].tolist()], n_results=k, include=[])
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(set(result["ids"][0]) & truth)
+    finally:
+        client.delete_collection(name)
+
+    return {
+        "M": m,
+        "ef_construction": ef_construction,
+        "ef_search": ef_search,
+        f"recall@{k}": round(hits / (len(query_rows) * k), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "build_s": round(build_seconds, 2),
+    }
+
+def choose_setting(results, k, target_recall):
+    """목표 recall 이상인 설정 중 p95 지연이 가장 짧은 설정 (없으면 recall 최고 설정)"""
+    recall_key = f"recall@{k}"
+    passing = [r for r in results if r[recall_key] >= target_recall]
+    if passing:
+        return min(passing, key=lambda r: (r["p95_ms"], r["M"], r["ef_construction"]))
+    return max(results, key=lambda r: (r[recall_key], -r["p95_ms"]))
+
+def run_benchmark(collection, m_values, ef_construction_values, ef_search_values, k=DEFAULT_TOP_K,
+                  query_ratio=DEFAULT_QUERY_RATIO):
+    """
+    HNSW 설정 조합별 recall@k / 지연 시간 측정
+
+    Returns:
+        tuple: (측정 결과 dict 목록, 거리 계산 방식)
+    """
+    import chromadb
+
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    data = load_collection_data(collection)
+    query_rows, corpus_rows = split_queries(len(data["ids"]), query_ratio)
+
+    # 정답: 질의 문서를 제외한 나머지 문서에 대한 전수 비교 결과
+    exact = exact_top_k(data["embeddings"][corpus_rows], data["embeddings"][query_rows], k, space)
+    truth_ids = [{data["ids"][corpus_rows[i]] for i in row} for row in exact]
+
+    client = chromadb.EphemeralClient()
+    results = []
+    for m, ef_construction, ef_search in itertools.product(m_values, ef_construction_values, ef_search_values):
+        result = benchmark_setting(client, data, query_rows, corpus_rows, truth_ids,
+                                   space, m, ef_construction, ef_search, k)
+        print(result, flush=True)
+        results.append(result)
+    return results, space
+
+def save_hnsw_config(setting, collection_name, space, k, path=HNSW_CONFIG_PATH):
+    """선택된 설정을 앱 설정 파일에 기록"""
+    config = {
+        "collection": collection_name,
+        "space": space,
+        "M": setting["M"],
+        "ef_construction": setting["ef_construction"],
+        "ef_search": setting["ef_search"],
+        f"recall@{k}": setting[f"recall@{k}"],
+        "p95_ms": setting["p95_ms"],
+        "measured_at": datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return config
+
+def load_hnsw_config(path=HNSW_CONFIG_PATH):
+    """저장된 HNSW 설정 (없으면 None)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def rebuild_with_config(client, collection_name, config):
+    """
+    저장된 설정으로 컬렉션 전체를 다시 구축
+
+    새 컬렉션을 임시 이름(<이름>__rebuild)으로 완성한 뒤 이름만 맞바꿉니다.
+      - 구축 도중 실패하면 기존 컬렉션은 그대로 남습니다.
+      - 기존 컬렉션은 지우지 않고 <이름>__previous 로 보관하므로, 실행 중인 앱 프로세스가 캐시해 둔
+        핸들(컬렉션 id 기준)은 계속 동작합니다. 앱을 다시 시작하면 새 컬렉션을 사용합니다.
+      - 보관한 이전 컬렉션은 다음 재구축 때 삭제됩니다.
+      - 두 번의 이름 변경 사이 아주 짧은 순간에는 <이름> 컬렉션이 없으므로, 그때 새로 시작한 앱은
+        컬렉션을 찾지 못할 수 있습니다 (다시 불러오면 정상).
+    """
+    source = client.get_collection(name=collection_name)
+    data = load_collection_data(source)
+    metadata = {k: v for k, v in (source.metadata or {}).items() if not k.startswith("hnsw:")}
+    metadata.update(hnsw_metadata(config["space"], config["M"], config["ef_construction"], config["ef_search"]))
+
+    temp_name = collection_name + REBUILD_SUFFIX
+    previous_name = collection_name + PREVIOUS_SUFFIX
+    existing = [col.name for col in client.list_collections()]
+    for name in (temp_name, previous_name):
+        if name in existing:
+            client.delete_collection(name)
+    rebuilt = build_collection(client, temp_name, data, np.arange(len(data["ids"])), metadata)
+
+    source.modify(name=previous_name)
+    rebuilt.modify(name=collection_name)
+    return len(data["ids"])
+
+if __name__ == "__main__":
+    import argparse
+    import chromadb
+
+    parser = argparse.ArgumentParser(description="HNSW 파라미터별 recall / 지연 시간 측정")
+    parser.add_argument("--db-path", default=DEFAULT_DB_PATH, help="Chroma 저장 경로")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION, help="대상 컬렉션")
+    parser.add_argument("--m", type=int, nargs="+", default=DEFAULT_M, help="M 후보")
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=DEFAULT_EF_CONSTRUCTION,
+                        help="ef_construction 후보")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=DEFAULT_EF_SEARCH, help="ef_search 후보")
+    parser.add_argument("--k", type=int, default=DEFAULT_TOP_K, help="recall@k 의 k")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="선택 기준 최소 recall")
+    parser.add_argument("--apply", action="store_true",
+                        help="측정 없이 data/hnsw_config.json 설정으로 컬렉션 재구축")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=args.db_path)
+
+    if args.apply:
+        config = load_hnsw_config()
+        if config is None:
+            parser.error(f"{HNSW_CONFIG_PATH} 가 없습니다. 먼저 측정을 실행하세요.")
+        name = config.get("collection", args.collection)
+        count = rebuild_with_config(client, name, config)
+        print(f"[{name}] {count}개 문서로 재구축 완료 "
+              f"(M={config['M']}, ef_construction={config['ef_construction']}, ef_search={config['ef_search']})")
+        print(f"이전 컬렉션은 {name}{PREVIOUS_SUFFIX} 로 보관했습니다. 앱을 다시 시작해야 새 인덱스를 사용합니다.")
+    else:
+        results, space = run_benchmark(client.get_collection(name=args.collection),
+                                       args.m, args.ef_construction, args.ef_search, args.k)
+        best = choose_setting(results, args.k, args.target_recall)
+        config = save_hnsw_config(best, args.collection, space, args.k)
+        print(f"선택된 설정: {config}")
+        print(f"{HNSW_CONFIG_PATH} 에 기록했습니다. 적용하려면 --apply 로 재구축하세요.")
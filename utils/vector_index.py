@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+# utils/vector_index.py
+# 프로그램 설명: Chroma 컬렉션의 임베딩을 메모리 매핑(NumPy) 행렬로 내보내 전수 비교(exact) 검색하는 대체 검색 엔진
+#
+# 뉴스 컬렉션은 문서 수가 적어서 HNSW 인덱스 대신 행렬 곱 한 번으로 전체 문서와 비교하는 편이 빠릅니다.
+#   python -m utils.vector_index export                ← data/chroma_db 컬렉션을 data/vector_index/<컬렉션>/ 로 내보내기
+#   python -m utils.vector_index export --dtype int8   ← 용량을 줄인 int8 양자화 (행별 scale 저장)
+#   python -m utils.vector_index verify                ← Chroma 검색 결과와 top-k 일치율 확인
+#
+# 저장 파일 (data/vector_index/<컬렉션>/)
+#   embeddings.npy  ← (문서 수, 차원) float16 또는 int8 행렬 (mmap으로 읽음)
+#   scales.npy      ← int8 양자화 시 행별 scale
+#   documents.jsonl ← 문서 본문/메타데이터 (offsets.npy 로 필요한 줄만 읽음)
+#   metadata.json   ← 필터용 메타데이터 표 (id, source, published_ymd 등)
+#   manifest.json   ← 문서 수, 차원, 거리 방식, 내용 fingerprint, 내보낸 시각
+#
+# fingerprint 는 id/문서/메타데이터 전체의 해시로, 문서 수가 같아도 메타데이터가 바뀌면
+# (예: python -m utils.news_filters 의 published_ymd 추가) 다시 내보내야 함을 감지합니다.
+
+import json
+import hashlib
+import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+VECTOR_INDEX_DIR = "data/vector_index"
+EXPORT_BATCH_SIZE = 500
+SEARCH_BLOCK_ROWS = 4096        # 한 번에 float32로 변환해 계산할 행 수 (메모리 사용량 제한)
+VECTOR_INDEX_FORMAT_VERSION = 2   # 2: manifest 에 fingerprint 추가
+
+def index_dir(collection_name, base_dir=VECTOR_INDEX_DIR):
+    return Path(base_dir) / collection_name
+
+def get_embedding_function():
+    """
+    질의 임베딩 함수 (컬렉션을 만들 때 사용한 Chroma 기본 임베딩 함수)
+
+    앱/내보내기/검증에서 이 함수를 get_collection(embedding_function=...)에 명시적으로 넘겨
+    Chroma 검색과 전수 검색이 같은 임베딩을 사용하도록 합니다.
+    """
+    from chromadb.utils import embedding_functions
+    return embedding_functions.DefaultEmbeddingFunction()
+
+def _update_fingerprint(digest, doc_id, document, metadata):
+    digest.update(json.dumps([doc_id, document, metadata or {}], ensure_ascii=False, sort_keys=True,
+                             default=str).encode('utf-8'))
+    digest.update(b"\n")
+
+def collection_fingerprint(collection, batch_size=EXPORT_BATCH_SIZE):
+    """컬렉션 id/문서/메타데이터 전체 내용 해시 (임베딩은 문서에서 정해지므로 제외)"""
+    digest = hashlib.sha256()
+    offset = 0
+    while True:
+        batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        if not batch["ids"]:
+            break
+        for doc_id, document, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+            _update_fingerprint(digest, doc_id, document, metadata)
+        offset += len(batch["ids"])
+    return digest.hexdigest()
+
+def export_collection(collection, dtype="float16", base_dir=VECTOR_INDEX_DIR):
+    """
+    Chroma 컬렉션을 메모리 매핑용 행렬 + 메타데이터 파일로 내보내는 함수
+
+    Args:
+        collection: Chroma 컬렉션
+        dtype (str): 'float16' 또는 'int8'
+        base_dir (str): 저장 디렉토리
+
+    Returns:
+        dict: manifest 정보
+    """
+    if dtype not in ("float16", "int8"):
+        raise ValueError(f"지원하지 않는 형식입니다: {dtype}")
+
+    out_dir = index_dir(collection.name, base_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    ids, embeddings, metadata_rows, offsets = [], [], [], []
+    digest = hashlib.sha256()
+    with open(out_dir / "documents.jsonl", 'wb') as f:
+        offset = 0
+        while True:
+            batch = collection.get(include=["embeddings", "documents", "metadatas"],
+                                   limit=EXPORT_BATCH_SIZE, offset=offset)
+            if not batch["ids"]:
+                break
+            for doc_id, embedding, document, metadata in zip(
+                    batch["ids"], batch["embeddings"], batch["documents"], batch["metadatas"]):
+                ids.append(doc_id)
+                embeddings.append(np.asarray(embedding, dtype=np.float32))
+                metadata_rows.append({"id": doc_id, **(metadata or {})})
+                offsets.append(f.tell())
+                _update_fingerprint(digest, doc_id, document, metadata)
+                line = json.dumps({"content": document, "metadata": metadata or {}}, ensure_ascii=False)
+                f.write(line.encode('utf-8') + b"\n")
+            offset += len(batch["ids"])
+
+    matrix = np.vstack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        np.save(out_dir / "scales.npy", scales.astype(np.float32))
+        np.save(out_dir / "embeddings.npy", np.round(matrix / scales[:, None]).astype(np.int8))
+    else:
+        np.save(out_dir / "embeddings.npy", matrix.astype(np.float16))
+        (out_dir / "scales.npy").unlink(missing_ok=True)
+    np.save(out_dir / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+    with open(out_dir / "metadata.json", 'w', encoding='utf-8') as f:
+        json.dump(metadata_rows, f, ensure_ascii=False)
+
+    manifest = {
+        "format_version": VECTOR_INDEX_FORMAT_VERSION,
+        "collection": collection.name,
+        "count": len(ids),
+        "dim": int(matrix.shape[1]) if len(ids) else 0,
+        "dtype": dtype,
+        "space": (collection.metadata or {}).get("hnsw:space", "l2"),
+        "fingerprint": digest.hexdigest(),
+        "exported_at": datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(out_dir / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def load_manifest(collection_name, base_dir=VECTOR_INDEX_DIR):
+    """내보낸 인덱스의 manifest (없으면 None)"""
+    try:
+        with open(index_dir(collection_name, base_dir) / "manifest.json", encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class MmapVectorIndex:
+    """메모리 매핑 행렬 기반 전수 비교 검색 인덱스"""
+
+    def __init__(self, collection_name, base_dir=VECTOR_INDEX_DIR):
+        self.path = index_dir(collection_name, base_dir)
+        self.manifest = load_manifest(collection_name, base_dir)
+        if self.manifest is None or self.manifest.get("format_version") != VECTOR_INDEX_FORMAT_VERSION:
+            raise FileNotFoundError(f"{self.path} 에 내보낸 인덱스가 없습니다. "
+                                    f"python -m utils.vector_index export 를 실행하세요.")
+
+        self.name = collection_name
+        self.space = self.manifest["space"]
+        self.embeddings = np.load(self.path / "embeddings.npy", mmap_mode='r')
+        scales_path = self.path / "scales.npy"
+        self.scales = np.load(scales_path) if scales_path.exists() else None
+        self.offsets = np.load(self.path / "offsets.npy")
+
+        with open(self.path / "metadata.json", encoding='utf-8') as f:
+            self.metadata = pd.DataFrame(json.load(f))
+        self.ids = self.metadata["id"].tolist() if len(self.metadata) else []
+
+        # cosine 거리 계산용 행 norm (한 번만 계산)
+        self.norms = self._row_norms() if self.space == "cosine" else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _blocks(self):
+        """행렬을 블록 단위 float32로 변환해 반환 (행 시작 위치, 블록)"""
+        for start in range(0, len(self), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.embeddings[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            if self.scales is not None:
+                block *= self.scales[start:start + SEARCH_BLOCK_ROWS, None]
+            yield start, block
+
+    def _row_norms(self):
+        norms = np.empty(len(self), dtype=np.float32)
+        for start, block in self._blocks():
+            norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+        norms[norms == 0] = 1.0
+        return norms
+
+    def _distances(self, queries):
+        """(질의 수, 문서 수) 거리 행렬 (Chroma와 같은 거리 정의)"""
+        queries = np.asarray(queries, dtype=np.float32)
+        distances = np.empty((len(queries), len(self)), dtype=np.float32)
+        query_sq = (queries ** 2).sum(axis=1)[:, None]
+        query_norms = np.linalg.norm(queries, axis=1)[:, None]
+        query_norms[query_norms == 0] = 1.0
+
+        for start, block in self._blocks():
+            dots = queries @ block.T
+            end = start + len(block)
+            if self.space == "cosine":
+                distances[:, start:end] = 1.0 - dots / (query_norms * self.norms[None, start:end])
+            elif self.space == "ip":
+                distances[:, start:end] = 1.0 - dots
+            else:
+                distances[:, start:end] = query_sq - 2 * dots + (block ** 2).sum(axis=1)[None, :]
+        return distances
+
+    def _where_mask(self, where):
+        """Chroma where 필터 중 자주 쓰는 연산자를 메타데이터 표에 적용한 boolean 배열"""
+        if not where:
+            return np.ones(len(self), dtype=bool)
+
+        masks = []
+        for key, condition in where.items():
+            if key == "$and":
+                masks.append(np.logical_and.reduce([self._where_mask(c) for c in condition]))
+            elif key == "$or":
+                masks.append(np.logical_or.reduce([self._where_mask(c) for c in condition]))
+            else:
+                column = self.metadata[key] if key in self.metadata.columns else pd.Series([None] * len(self))
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, value in condition.items():
+                    present = column.notna().to_numpy()
+                    if op == "$eq":
+                        mask = (column == value).to_numpy()
+                    elif op == "$ne":
+                        mask = (column != value).to_numpy()
+                    elif op == "$in":
+                        mask = column.isin(value).to_numpy()
+                    elif op == "$nin":
+                        mask = ~column.isin(value).to_numpy()
+                    elif op in ("$gt", "$gte", "$lt", "$lte"):
+                        numbers = pd.to_numeric(column, errors='coerce')
+                        mask = {"$gt": numbers > value, "$gte": numbers >= value,
+                                "$lt": numbers < value, "$lte": numbers <= value}[op].to_numpy()
+                    else:
+                        raise ValueError(f"지원하지 않는 where 연산자입니다: {op}")
+                    masks.append(mask & present if op not in ("$ne", "$nin") else mask)
+        return np.logical_and.reduce(masks)
+
+    def _read_documents(self, rows):
+        """필요한 문서 줄만 읽기"""
+        documents = []
+        with open(self.path / "documents.jsonl", 'rb') as f:
+            for row in rows:
+                f.seek(int(self.offsets[row]))
+                documents.append(json.loads(f.readline()))
+        return documents
+
+    def query(self, query_embeddings, n_results=10, where=None):
+        """
+        여러 질의를 한 번에 검색 (Chroma collection.query 와 같은 형태의 결과)
+
+        Args:
+            query_embeddings (list): 질의 임베딩 목록
+            n_results (int): 질의별 결과 수
+            where (dict): Chroma where 필터
+
+        Returns:
+            dict: ids, documents, metadatas, distances (질의별 목록)
+        """
+        distances = self._distances(query_embeddings)
+        mask = self._where_mask(where)
+        distances[:, ~mask] = np.inf
+
+        k = int(min(n_results, mask.sum()))
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if k == 0:
+            for key in result:
+                result[key] = [[] for _ in range(len(distances))]
+            return result
+
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, top, axis=1).argsort(axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+
+        for query_index, rows in enumerate(top):
+            documents = self._read_documents(rows)
+            result["ids"].append([self.ids[row] for row in rows])
+            result["documents"].append([doc["content"] for doc in documents])
+            result["metadatas"].append([doc["metadata"] for doc in documents])
+            result["distances"].append(distances[query_index, rows].tolist())
+        return result
+
+def verify_index(collection, index, queries, embedding_function, k=10):
+    """
+    같은 질의로 Chroma와 내보낸 인덱스의 top-k 결과를 비교
+
+    Returns:
+        dict: 평균 top-k 일치율, top-1 일치율
+    """
+    embeddings = embedding_function(queries)
+    mmap_result = index.query(embeddings, n_results=k)
+    overlaps, top1 = [], []
+    for i, embedding in enumerate(embeddings):
+        chroma_ids = collection.query(query_embeddings=[list(embedding)], n_results=k, include=[])["ids"][0]
+        mmap_ids = mmap_result["ids"][i]
+        overlaps.append(len(set(chroma_ids) & set(mmap_ids)) / max(1, len(chroma_ids)))
+        top1.append(bool(chroma_ids) and bool(mmap_ids) and chroma_ids[0] == mmap_ids[0])
+    return {f"top{k}_overlap": round(float(np.mean(overlaps)), 4), "top1_match": round(float(np.mean(top1)), 4)}
+
+if __name__ == "__main__":
+    import argparse
+    import chromadb
+    from utils.tune_hnsw import is_internal_collection
+
+    parser = argparse.ArgumentParser(description="Chroma 컬렉션을 메모리 매핑 전수 검색 인덱스로 내보내기/검증")
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--db-path", default="data/chroma_db", help="Chroma 저장 경로")
+    parser.add_argument("--collection", help="대상 컬렉션 (생략 시 전체)")
+    parser.add_argument("--dtype", default="float16", choices=["float16", "int8"], help="행렬 저장 형식")
+    parser.add_argument("--k", type=int, default=10, help="검증할 top-k")
+    parser.add_argument("--queries", nargs="+", default=[
+        "금연 정책", "흡연 부스 설치 효과", "전자담배 규제", "담배 가격 인상", "청소년 흡연율",
+    ], help="검증용 질의")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=args.db_path)
+    embedding_function = get_embedding_function()
+    names = [args.collection] if args.collection else [
+        col.name for col in client.list_collections() if not is_internal_collection(col.name)]
+    for name in names:
+        collection = client.get_collection(name=name, embedding_function=embedding_function)
+        if args.command == "export":
+            manifest = export_collection(collection, args.dtype)
+            print(f"[{name}] {manifest['count']}개 문서 내보내기 완료 ({manifest['dtype']}, {manifest['dim']}차원)")
+        else:
+            report = verify_index(collection, MmapVectorIndex(name), args.queries, embedding_function, args.k)
+            print(f"[{name}] Chroma 결과 일치율: {report}")
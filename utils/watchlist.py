@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# utils/watchlist.py
+# 프로그램 설명: 관심 검색어(워치리스트)의 네이버 쇼핑 가격을 주기적으로 갱신하고 변경 내역/가격 알림을 기록하는 스케줄러
+#
+# Streamlit 앱과 별도 프로세스로 실행하므로 사용자 화면 갱신과 자원을 다투지 않습니다.
+#   python -m utils.watchlist run                    ← 설정된 주기마다 계속 갱신
+#   python -m utils.watchlist run --once             ← 한 번만 갱신
+#   python -m utils.watchlist add "액상형 전자담배" --below 20000
+#
+# 저장 파일 (data/watchlist/)
+#   snapshots/<검색어>.csv   ← 비교 기준이 되는 마지막 검색 결과 (검색어당 1개, 덮어씀)
+#   changes.jsonl            ← 이전 결과와 달라진 상품만 기록 (신규/삭제/가격 변경, 첫 갱신은 기준만 저장)
+#   alerts.jsonl             ← 최저가가 설정 금액 아래로 내려간 상품 (쇼핑 탭에 표시)
+
+import json
+import random
+import threading
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import pandas as pd
+
+from utils.naver_api_shop import fetch_shopping_data
+
+WATCHLIST_CONFIG_PATH = "data/watchlist.json"
+WATCHLIST_DIR = "data/watchlist"
+
+DEFAULT_CONFIG = {
+    "interval_minutes": 60,     # 전체 워치리스트 갱신 주기
+    "max_concurrency": 2,       # 동시에 호출할 검색어 수 (API 호출 한도 보호)
+    "jitter_seconds": 30,       # 호출 시각을 흩뜨리기 위한 무작위 지연 최대값
+    "queries": [],
+}
+
+SNAPSHOT_COLUMNS = ['productId', 'title', 'mallName', 'lprice', 'link']
+
+_write_lock = threading.Lock()
+
+def load_watchlist_config(path=WATCHLIST_CONFIG_PATH):
+    """워치리스트 설정 로드 (없으면 기본값)"""
+    config = dict(DEFAULT_CONFIG)
+    if Path(path).exists():
+        with open(path, encoding='utf-8') as f:
+            config.update(json.load(f))
+    return config
+
+def save_watchlist_config(config, path=WATCHLIST_CONFIG_PATH):
+    """워치리스트 설정 저장"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+def _safe_name(search_query):
+    """검색어를 파일명으로 쓸 수 있게 변환 (save_to_csv와 같은 규칙)"""
+    return "".join(c for c in search_query if c.isalnum() or c in (' ', '-', '_')).rstrip()
+
+def _product_key(row):
+    """상품 식별 키 (productId가 없으면 링크 사용)"""
+    product_id = row.get('productId')
+    if pd.notna(product_id) and str(product_id).strip():
+        return str(product_id).split('.')[0]
+    return str(row.get('link', ''))
+
+def _to_price(value):
+    return int(value) if pd.notna(value) else None
+
+def diff_snapshots(previous, current):
+    """
+    이전 검색 결과와 현재 검색 결과를 비교해 달라진 상품만 반환하는 함수
+
+    Args:
+        previous (pd.DataFrame or None): 이전 스냅샷 (없으면 모든 상품을 신규로 간주)
+        current (pd.DataFrame): 현재 검색 결과
+
+    Returns:
+        list: 변경 내역 dict 목록 (change: 'new' / 'removed' / 'price')
+    """
+    def index_rows(df):
+        if df is None or df.empty:
+            return {}
+        return {_product_key(row): row for row in df.to_dict('records')}
+
+    before, after = index_rows(previous), index_rows(current)
+    changes = []
+
+    for key, row in after.items():
+        new_price = _to_price(row.get('lprice'))
+        record = {"productId": key, "title": row.get('title'), "mallName": row.get('mallName'),
+                  "link": row.get('link'), "new_lprice": new_price}
+        if key not in before:
+            changes.append({**record, "change": "new", "old_lprice": None})
+        else:
+            old_price = _to_price(before[key].get('lprice'))
+            if old_price != new_price:
+                changes.append({**record, "change": "price", "old_lprice": old_price})
+
+    for key, row in before.items():
+        if key not in after:
+            changes.append({"productId": key, "title": row.get('title'), "mallName": row.get('mallName'),
+                            "link": row.get('link'), "change": "removed",
+                            "old_lprice": _to_price(row.get('lprice')), "new_lprice": None})
+    return changes
+
+def find_price_alerts(changes, threshold):
+    """최저가가 threshold 아래로 새로 내려간 상품 (이미 아래였던 상품은 다시 알리지 않음)"""
+    if not threshold:
+        return []
+    return [
+        change for change in changes
+        if change["change"] in ("new", "price")
+        and change["new_lprice"] is not None and 0 < change["new_lprice"] < threshold
+        and (change["old_lprice"] is None or change["old_lprice"] >= threshold)
+    ]
+
+def _append_jsonl(path, records):
+    if not records:
+        return
+    with _write_lock:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def refresh_query(entry, base_dir=WATCHLIST_DIR, jitter_seconds=0):
+    """
+    워치리스트 검색어 하나를 갱신하는 함수
+
+    Args:
+        entry (dict): {"query": 검색어, "display": 개수, "sort": 정렬, "alert_below": 알림 기준가}
+        base_dir (str): 저장 디렉토리
+        jitter_seconds (float): 호출 전 무작위 지연 최대값
+
+    Returns:
+        dict: 갱신 결과 요약 (변경 수, 알림 수)
+    """
+    if jitter_seconds:
+        time.sleep(random.uniform(0, jitter_seconds))
+
+    query = entry["query"]
+    current = fetch_shopping_data(query, entry.get("display", 100), entry.get("sort", "sim"))
+
+    snapshot_path = Path(base_dir) / "snapshots" / f"{_safe_name(query)}.csv"
+    previous = pd.read_csv(snapshot_path, encoding='utf-8-sig') if snapshot_path.exists() else None
+
+    # 첫 갱신은 비교 대상이 없으므로 모든 상품이 '신규'가 됨 → 기준 스냅샷만 조용히 저장
+    if previous is None:
+        changes, alerts = [], []
+    else:
+        changes = diff_snapshots(previous, current)
+        alerts = find_price_alerts(changes, entry.get("alert_below"))
+
+    checked_at = datetime.datetime.now().isoformat(timespec='seconds')
+    _append_jsonl(Path(base_dir) / "changes.jsonl",
+                  [{"checked_at": checked_at, "query": query, **change} for change in changes])
+    _append_jsonl(Path(base_dir) / "alerts.jsonl",
+                  [{"checked_at": checked_at, "query": query, "threshold": entry.get("alert_below"), **alert}
+                   for alert in alerts])
+
+    # 다음 비교를 위한 기준 스냅샷 (필요한 컬럼만)
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    columns = [col for col in SNAPSHOT_COLUMNS if col in current.columns]
+    current[columns].to_csv(snapshot_path, encoding='utf-8-sig', index=False)
+
+    return {"query": query, "상품수": len(current), "변경": len(changes), "알림": len(alerts),
+            "기준저장": previous is None}
+
+def run_once(config, base_dir=WATCHLIST_DIR):
+    """워치리스트 전체를 동시 실행 수 제한과 무작위 지연을 두고 한 번 갱신"""
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, config["max_concurrency"])) as executor:
+        futures = {
+            executor.submit(refresh_query, entry, base_dir, config["jitter_seconds"]): entry["query"]
+            for entry in config["queries"]
+        }
+        for future, query in futures.items():
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"query": query, "오류": str(e)})
+    return results
+
+def run_forever(config_path=WATCHLIST_CONFIG_PATH, base_dir=WATCHLIST_DIR):
+    """설정된 주기마다 워치리스트 갱신 (설정 파일은 매 주기마다 다시 읽음)"""
+    while True:
+        config = load_watchlist_config(config_path)
+        for result in run_once(config, base_dir):
+            print(f"[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] {result}", flush=True)
+        interval = config["interval_minutes"] * 60
+        time.sleep(max(60, interval + random.uniform(-config["jitter_seconds"], config["jitter_seconds"])))
+
+def load_recent_alerts(base_dir=WATCHLIST_DIR, limit=20):
+    """
+    최근 가격 알림 로드 (쇼핑 탭 표시용)
+
+    Returns:
+        pd.DataFrame: 최신순 알림 목록 (없으면 빈 DataFrame)
+    """
+    alerts_path = Path(base_dir) / "alerts.jsonl"
+    if not alerts_path.exists():
+        return pd.DataFrame()
+    with open(alerts_path, encoding='utf-8') as f:
+        lines = f.readlines()[-limit:]
+    alerts = [json.loads(line) for line in lines if line.strip()]
+    return pd.DataFrame(alerts[::-1])
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="네이버 쇼핑 워치리스트 가격 갱신")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="워치리스트 갱신 실행")
+    run_parser.add_argument("--once", action="store_true", help="한 번만 갱신하고 종료")
+
+    add_parser = subparsers.add_parser("add", help="워치리스트에 검색어 추가")
+    add_parser.add_argument("query", help="검색어")
+    add_parser.add_argument("--below", type=int, help="최저가가 이 금액 아래로 내려가면 알림")
+    add_parser.add_argument("--display", type=int, default=100, help="가져올 상품 수")
+    add_parser.add_argument("--sort", default="sim", choices=["date", "sim", "asc", "dsc"], help="정렬 방식")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        config = load_watchlist_config()
+        config["queries"] = [q for q in config["queries"] if q["query"] != args.query]
+        config["queries"].append({"query": args.query, "display": args.display, "sort": args.sort,
+                                  "alert_below": args.below})
+        save_watchlist_config(config)
+        print(f"워치리스트에 추가: {args.query}")
+    elif args.once:
+        for result in run_once(load_watchlist_config()):
+            print(result)
+    else:
+        run_forever()